@@ -0,0 +1,180 @@
+"""Process many PDFs concurrently and write per-document outputs plus a summary report.
+
+    python batch.py documents/ "archive/**/*.pdf" --out batch_output --documents 4
+
+Every document runs through the same DocumentProcessor, so all of them share
+one completion cache, layout cache and rate limiter: `--documents` caps how many
+are in flight, and OPENAI_RPM / OPENAI_TPM / OPENAI_MAX_IN_FLIGHT cap the LLM
+traffic they generate together. Layout analyses for the next `--prefetch`
+documents are started early on the async Document Intelligence client
+(at most DOCINTEL_MAX_IN_FLIGHT at once), so a document's layout is usually
+ready by the time a slot frees up for it. Each document is checkpointed under
+<out>/<name>/run, so re-running the same command resumes where it stopped and
+skips documents that already finished.
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from checkpoint import RunCheckpoint
+from metrics import REGISTRY
+from pipeline import EXAMPLE_DOCUMENT, build_pipeline, pdf_page_count
+
+
+def find_documents(inputs):
+    """Expand directories (their *.pdf files), globs and plain paths, keeping the first occurrence"""
+    paths = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, "*.pdf"))
+        else:
+            matches = glob.glob(pattern, recursive=True)
+        paths.extend(sorted(matches))
+    return list(dict.fromkeys(os.path.abspath(path) for path in paths))
+
+
+def output_names(paths):
+    """Output directory name per document: the file stem, suffixed when stems collide"""
+    names, seen = {}, {}
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        seen[stem] = seen.get(stem, 0) + 1
+        names[path] = stem if seen[stem] == 1 else f"{stem}-{seen[stem]}"
+    return names
+
+
+def process_one(pipeline, evaluator, pdf_path, out_dir, example_document, evaluate, checkpoint=None):
+    """Run one document and write <out_dir>/result.json; returns the report row"""
+    start = time.perf_counter()
+    row = {"document": pdf_path, "output": out_dir, "pages": None}
+    try:
+        row["pages"] = pdf_page_count(pdf_path)
+        if checkpoint is None:
+            checkpoint = open_checkpoint(pipeline, pdf_path, out_dir)
+        document = pipeline.process_document(pdf_path, example_document, checkpoint)
+        result = {"sections": document.sections, "stats": document.stats}
+        if evaluate:
+            result["evaluation"] = evaluator.compare_documents(document, example_document)
+        with open(os.path.join(out_dir, "result.json"), "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        row["status"] = "ok"
+        row.update(document.stats)
+    except Exception as e:
+        pipeline.discard_prefetched(pdf_path)
+        row["status"] = "failed"
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["seconds"] = round(time.perf_counter() - start, 3)
+    return row
+
+
+def open_checkpoint(pipeline, pdf_path, out_dir):
+    return RunCheckpoint(os.path.join(out_dir, "run"), pdf_path, pipeline.pages_per_range,
+                         pipeline.checkpoint_settings())
+
+
+def prefetch_one(pipeline, pdf_path, out_dir):
+    """Start a document's layout analyses ahead of processing; returns its checkpoint.
+
+    Returns None on failure, leaving process_one to retry and report the error.
+    """
+    try:
+        checkpoint = open_checkpoint(pipeline, pdf_path, out_dir)
+        pipeline.prefetch_layout(pdf_path, checkpoint)
+        return checkpoint
+    except Exception:
+        return None
+
+
+def run_batch(pipeline, evaluator, paths, out, max_documents=4, example_document=EXAMPLE_DOCUMENT,
+              evaluate=False, force=False, prefetch=4):
+    """Process paths with up to max_documents in flight and return the summary report.
+
+    The layout analyses of up to prefetch further documents are started ahead
+    of time, so documents reach classification as soon as a slot frees up
+    instead of waiting for their layout then.
+    """
+    names = output_names(paths)
+    rows, todo = [], deque()
+    for path in paths:
+        out_dir = os.path.join(out, names[path])
+        os.makedirs(out_dir, exist_ok=True)
+        if not force and os.path.exists(os.path.join(out_dir, "result.json")):
+            rows.append({"document": path, "output": out_dir, "status": "skipped"})
+        else:
+            todo.append((path, out_dir))
+
+    start = time.perf_counter()
+    max_documents = max(1, max_documents)
+    started, running = deque(), set()
+    with ThreadPoolExecutor(max_workers=max_documents) as executor:
+        while todo or started or running:
+            while todo and len(started) + len(running) < max_documents + prefetch:
+                path, out_dir = todo.popleft()
+                started.append((path, out_dir, prefetch_one(pipeline, path, out_dir) if prefetch else None))
+            while started and len(running) < max_documents:
+                path, out_dir, checkpoint = started.popleft()
+                running.add(executor.submit(process_one, pipeline, evaluator, path, out_dir,
+                                            example_document, evaluate, checkpoint))
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                row = future.result()
+                rows.append(row)
+                print(f"{row['status']:7s} {row['seconds']:8.1f}s  {row['pages'] or '?':>5} pages  "
+                      f"{os.path.basename(row['document'])}{'  ' + row['error'] if 'error' in row else ''}")
+    elapsed = time.perf_counter() - start
+
+    finished = [row for row in rows if row["status"] == "ok"]
+    pages = sum(row["pages"] for row in finished)
+    minutes = elapsed / 60
+    report = {
+        "documents": len(paths),
+        "processed": len(finished),
+        "failed": sum(row["status"] == "failed" for row in rows),
+        "skipped": sum(row["status"] == "skipped" for row in rows),
+        "pages": pages,
+        "seconds": round(elapsed, 3),
+        "documents_per_minute": round(len(finished) / minutes, 2) if minutes else None,
+        "pages_per_minute": round(pages / minutes, 2) if minutes else None,
+        "chunks_avoided": sum(row.get("chunks_avoided", 0) for row in finished),
+        "results": sorted(rows, key=lambda row: row["document"]),
+    }
+    with open(os.path.join(out, "report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns")
+    parser.add_argument("--out", default="batch_output")
+    parser.add_argument("--documents", type=int, default=int(os.getenv("BATCH_DOCUMENTS", "4")),
+                        help="documents processed at the same time")
+    parser.add_argument("--prefetch", type=int, default=int(os.getenv("BATCH_PREFETCH", "4")),
+                        help="further documents whose layout analysis is started ahead of processing")
+    parser.add_argument("--evaluate", action="store_true", help="also score each document against the example")
+    parser.add_argument("--force", action="store_true", help="reprocess documents that already have a result")
+    args = parser.parse_args()
+
+    paths = find_documents(args.inputs)
+    if not paths:
+        parser.error("no PDFs matched")
+    pipeline, evaluator, llm = build_pipeline()
+    report = run_batch(pipeline, evaluator, paths, args.out, args.documents,
+                       evaluate=args.evaluate, force=args.force, prefetch=args.prefetch)
+    pipeline.doc_client.close()
+
+    print(f"\n{report['processed']} processed, {report['failed']} failed, {report['skipped']} skipped "
+          f"in {report['seconds']:.1f}s: {report['documents_per_minute']} documents/min, "
+          f"{report['pages_per_minute']} pages/min")
+    print(f"Completion cache: {llm.cache.stats()}")
+    print(f"Report: {os.path.join(args.out, 'report.json')}")
+    if os.getenv("METRICS_PATH"):
+        with open(os.getenv("METRICS_PATH"), "w") as f:
+            f.write(REGISTRY.render())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Peak RSS of holding layout chunks as {'text', 'role'} dicts vs a ChunkStore.
+
+Each representation is built in a fresh interpreter, from paragraphs generated
+on the fly, so the peak RSS delta is what the representation itself costs.
+
+Run from document-intel/:  python -m benchmarks.bench_chunks --paragraphs 100000
+"""
+import argparse
+import random
+import resource
+import subprocess
+import sys
+import time
+
+ROLES = [None, None, None, None, "sectionHeading", "pageHeader", "pageFooter", "pageNumber"]
+WORDS = ["the", "shall", "fiscal", "year", "amount", "appropriated", "section", "flood",
+         "port", "wildfire", "employee", "salaries", "grant", "program", "$1,000,000"]
+
+
+def synthetic_paragraphs(n, seed=0):
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 60))), rng.choice(ROLES)
+
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def build(mode, paragraphs):
+    if mode == "dicts":
+        return [{"text": text, "role": role} for text, role in synthetic_paragraphs(paragraphs)]
+    from chunks import ChunkStore
+
+    store = ChunkStore()
+    for text, role in synthetic_paragraphs(paragraphs):
+        store.append(text, role)
+    return store
+
+
+def child(mode, paragraphs):
+    before = peak_rss_kb()
+    start = time.perf_counter()
+    chunks = build(mode, paragraphs)
+    elapsed = time.perf_counter() - start
+    print(f"{peak_rss_kb() - before} {elapsed} {len(chunks)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--paragraphs", type=int, default=100000)
+    parser.add_argument("--child", choices=["dicts", "store"])
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child, args.paragraphs)
+
+    for mode in ("dicts", "store"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_chunks", "--child", mode, "--paragraphs", str(args.paragraphs)],
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        rss_kb, elapsed, count = int(output[0]), float(output[1]), int(output[2])
+        print(f"{mode:6s} {count} chunks  peak RSS +{rss_kb / 1024:7.1f} MB  "
+              f"{rss_kb * 1024 / count:6.0f} B/chunk  built in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Classification throughput against a local fake OpenAI server.
+
+Run from document-intel/:  python -m benchmarks.bench_classify
+"""
+import argparse
+import random
+import time
+from openai import AzureOpenAI
+from benchmarks.fake_openai import FakeOpenAI
+from pipeline import DocumentProcessor
+
+WORDS = ["flood", "port", "wildfire", "employee", "salaries", "grant", "program",
+         "the", "shall", "fiscal", "year", "amount", "appropriated", "section"]
+
+
+def synthetic_paragraphs(n, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(40)) for _ in range(n)]
+
+
+def run(processor, texts):
+    start = time.perf_counter()
+    labels = processor.classify_chunks(texts)
+    return labels, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--rate-limit-prob", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--batch-tokens", type=int, nargs="+", default=[0, 3000],
+                        help="0 classifies one chunk per request")
+    args = parser.parse_args()
+
+    texts = synthetic_paragraphs(args.chunks)
+    with FakeOpenAI(latency=args.latency, rate_limit_prob=args.rate_limit_prob) as server:
+        client = AzureOpenAI(api_version="2024-08-01-preview", azure_endpoint=server.endpoint,
+                             api_key="fake", max_retries=0)
+        baseline = None
+        for batch_tokens in args.batch_tokens:
+            for concurrency in args.concurrency:
+                processor = DocumentProcessor(None, client, max_concurrency=concurrency,
+                                              batch_tokens=batch_tokens)
+                requests, prompt_tokens = server.requests, server.prompt_tokens
+                labels, elapsed = run(processor, texts)
+                baseline = baseline or labels
+                assert labels == baseline, "labels must come back in paragraph order"
+                print(f"batch_tokens={batch_tokens:5d} concurrency={concurrency:3d}  "
+                      f"{elapsed:7.2f}s  {len(texts) / elapsed:8.1f} chunks/s  "
+                      f"requests={server.requests - requests:5d}  "
+                      f"prompt_tokens={server.prompt_tokens - prompt_tokens}")
+        print(f"rate_limited={server.rate_limited}")
+
+
+if __name__ == "__main__":
+    main()
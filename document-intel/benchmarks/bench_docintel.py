@@ -0,0 +1,82 @@
+"""Batch throughput against local fake Document Intelligence and OpenAI servers.
+
+Compares the sync client, where each document thread blocks on its own poller,
+with the async client and layout prefetching, where many analyses are in flight
+while earlier documents are classified.
+
+Run from document-intel/:  python -m benchmarks.bench_docintel --documents 24 --layout-latency 3
+"""
+import argparse
+import os
+import tempfile
+import time
+from azure.ai.documentintelligence import DocumentIntelligenceClient
+from azure.core.credentials import AzureKeyCredential
+from openai import AzureOpenAI
+from pypdf import PdfWriter
+from batch import run_batch
+from benchmarks.bench_structure import synthetic_bill
+from benchmarks.fake_docintel import FakeDocumentIntelligence
+from benchmarks.fake_openai import FakeOpenAI, keyword_responder
+from layout_client import AsyncLayoutClient
+from pipeline import EXAMPLE_DOCUMENT, DocumentProcessor, DocumentEvaluator
+
+LAYOUT = synthetic_bill(1)[0].as_dict()
+
+
+def responder(messages):
+    prompt = messages[-1]["content"]
+    if prompt.startswith("Generate"):
+        return "A generated section."
+    return keyword_responder(messages)
+
+
+def write_pdfs(directory, count):
+    paths = []
+    for index in range(count):
+        writer = PdfWriter()
+        writer.add_blank_page(612, 792)
+        path = os.path.join(directory, f"document-{index:03d}.pdf")
+        with open(path, "wb") as f:
+            writer.write(f)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=24)
+    parser.add_argument("--workers", type=int, default=4, help="documents processed at the same time")
+    parser.add_argument("--layout-latency", type=float, default=3.0)
+    parser.add_argument("--latency", type=float, default=0.02, help="chat completion latency")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    paths = write_pdfs(directory, args.documents)
+    credential = AzureKeyCredential("fake")
+    with FakeOpenAI(latency=args.latency, responder=responder) as openai_server, \
+            FakeDocumentIntelligence(latency=args.layout_latency, responder=lambda body, pages: LAYOUT) as server:
+        llm = AzureOpenAI(api_version="2024-08-01-preview", azure_endpoint=openai_server.endpoint,
+                          api_key="fake", max_retries=0)
+        scenarios = (
+            ("sync, no prefetch", lambda: DocumentIntelligenceClient(server.endpoint, credential), 0),
+            ("async, fixed 1s polls", lambda: AsyncLayoutClient(server.endpoint, credential, polling_backoff=1.0),
+             args.documents),
+            ("async, backoff polls", lambda: AsyncLayoutClient(server.endpoint, credential), args.documents),
+        )
+        for name, make_client, prefetch in scenarios:
+            doc_client = make_client()
+            processor = DocumentProcessor(doc_client, llm, max_concurrency=8)
+            analyses, polls = server.analyses, server.polls
+            start = time.perf_counter()
+            report = run_batch(processor, DocumentEvaluator(llm), paths, os.path.join(directory, name),
+                               args.workers, EXAMPLE_DOCUMENT, prefetch=prefetch)
+            elapsed = time.perf_counter() - start
+            doc_client.close()
+            print(f"{name:22s} {report['processed']:3d} documents in {elapsed:6.2f}s "
+                  f"({report['documents_per_minute']:7.1f}/min)  analyses={server.analyses - analyses:3d} "
+                  f"status polls={server.polls - polls:4d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Pre-filter: chunks and GPT requests avoided on a synthetic bill layout, and filter time vs size.
+
+Filter time is measured on the bill layout and on appropriations that repeat
+one sentence with different amounts, which are all kept.
+
+Run from document-intel/:  python -m benchmarks.bench_prefilter --pages 50
+"""
+import argparse
+import random
+import time
+from azure.ai.documentintelligence.models import AnalyzeResult
+from openai import AzureOpenAI
+from benchmarks.bench_classify import WORDS
+from benchmarks.fake_openai import FakeOpenAI
+from pipeline import DocumentProcessor
+from prefilter import PreFilter
+
+BOILERPLATE = "All provisions of this Act shall take effect on the date of enactment unless otherwise specified herein"
+
+
+def synthetic_layout(pages, paragraphs_per_page=20, seed=0):
+    """Bill-like pages: header, footer and page number on each, repeated boilerplate, short fragments"""
+    rng = random.Random(seed)
+    content, paragraphs, page_words = "", [], []
+
+    def add(text, role=None, confidence=0.99):
+        nonlocal content
+        offset = len(content)
+        paragraphs.append({"content": text, "role": role, "spans": [{"offset": offset, "length": len(text)}]})
+        position = offset
+        for word in text.split(" "):
+            page_words.append({"content": word, "confidence": confidence,
+                               "span": {"offset": position, "length": len(word)}})
+            position += len(word) + 1
+        content += text + "\n"
+
+    for page in range(1, pages + 1):
+        add("H.R. 82 - Social Security Fairness Act", "pageHeader")
+        for _ in range(paragraphs_per_page):
+            kind = rng.random()
+            if kind < 0.1:
+                add(BOILERPLATE + rng.choice(["", ".", ";"]))
+            elif kind < 0.2:
+                add(f"SEC. {rng.randint(100, 999)}.")
+            elif kind < 0.25:
+                add(" ".join(rng.choice(WORDS) for _ in range(30)), confidence=0.4)
+            else:
+                add(" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))))
+        add(f"{page}", "pageNumber")
+        add("VerDate Sep 11 2014 Jkt 000000 PO 00000 Frm 00001", "pageFooter")
+    return AnalyzeResult({"content": content, "paragraphs": paragraphs, "tables": [],
+                          "pages": [{"pageNumber": 1, "words": page_words}]})
+
+
+def amount_repeats(paragraphs, seed=0):
+    """The same appropriation sentence over and over, each time with a different amount"""
+    rng = random.Random(seed)
+    texts = [f"For necessary expenses of the Corps of Engineers for flood control and port infrastructure "
+             f"projects, ${rng.randrange(10 ** 9):,}, to remain available until expended." for _ in range(paragraphs)]
+    return AnalyzeResult({"content": "", "tables": [], "pages": [],
+                          "paragraphs": [{"content": text, "role": None, "spans": []} for text in texts]})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--scaling", type=int, nargs="+", default=[100, 1000],
+                        help="page counts to time the filter alone at")
+    args = parser.parse_args()
+
+    result = synthetic_layout(args.pages)
+    with FakeOpenAI(latency=args.latency) as server:
+        client = AzureOpenAI(api_version="2024-08-01-preview", azure_endpoint=server.endpoint,
+                             api_key="fake", max_retries=0)
+        for name, prefilter in (("no filter", None), ("pre-filter", PreFilter())):
+            processor = DocumentProcessor(None, client, max_concurrency=16, batch_tokens=0, prefilter=prefilter)
+            run = prefilter.new_run() if prefilter else None
+            chunks = processor.extract_chunks(result, run)
+            requests = server.requests
+            processor.classify_chunks(chunks.texts())
+            print(f"{name:10s} paragraphs={len(result.paragraphs):6d} chunks={len(chunks):6d} "
+                  f"requests={server.requests - requests:6d}"
+                  + (f"  {run.counts}" if run else ""))
+
+    for name, layouts in (("bill", [synthetic_layout(pages) for pages in args.scaling]),
+                          ("amounts", [amount_repeats(pages * 20) for pages in args.scaling])):
+        for result in layouts:
+            processor = DocumentProcessor(None, None, prefilter=PreFilter())
+            run = processor.prefilter.new_run()
+            start = time.perf_counter()
+            processor.extract_chunks(result, run)
+            elapsed = time.perf_counter() - start
+            print(f"{name:8s} {len(result.paragraphs):7d} paragraphs filtered in {elapsed:6.2f}s "
+                  f"({elapsed / len(result.paragraphs) * 1e6:5.1f} us/paragraph)  kept={run.counts.get('kept', 0)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Classification against a fake endpoint that enforces an RPM/TPM quota.
+
+Compares plain retry-on-429 with the shared RateLimiter. The quota window is
+shortened to --period seconds so a run takes seconds instead of minutes; the
+limiter is given the same quota and window.
+
+Run from document-intel/:  python -m benchmarks.bench_ratelimit
+"""
+import argparse
+import time
+from openai import AzureOpenAI
+from benchmarks.bench_classify import synthetic_paragraphs
+from benchmarks.fake_openai import FakeOpenAI
+from llm import LLM_REQUESTS, ChatClient
+from pipeline import DocumentProcessor
+from ratelimit import RateLimiter
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=150)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--rpm", type=int, default=40, help="requests allowed per --period")
+    parser.add_argument("--tpm", type=int, default=6000, help="tokens allowed per --period")
+    parser.add_argument("--period", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    texts = synthetic_paragraphs(args.chunks)
+    for name in ("retry only", "rate limiter"):
+        with FakeOpenAI(latency=args.latency, rpm=args.rpm, tpm=args.tpm, period=args.period) as server:
+            # The SDK's default retries are left on, as in production; ChatClient turns them off
+            client = AzureOpenAI(api_version="2024-08-01-preview", azure_endpoint=server.endpoint, api_key="fake")
+            limiter = None
+            if name == "rate limiter":
+                limiter = RateLimiter(rpm=args.rpm, tpm=args.tpm, period=args.period,
+                                      max_concurrency=args.concurrency)
+            llm = ChatClient(client, max_retries=50, limiter=limiter)
+            processor = DocumentProcessor(None, llm, max_concurrency=args.concurrency, batch_tokens=0)
+            seen = LLM_REQUESTS.value(model="gpt-4o-mini", outcome="rate_limited")
+            start = time.perf_counter()
+            processor.classify_chunks(texts)
+            elapsed = time.perf_counter() - start
+            seen = LLM_REQUESTS.value(model="gpt-4o-mini", outcome="rate_limited") - seen
+            print(f"{name:12s}  {elapsed:6.2f}s  {len(texts) / elapsed:6.1f} chunks/s  "
+                  f"requests={server.requests:5d}  429s={server.rate_limited:5d}  seen by ChatClient={seen:5.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Embedding router vs GPT-only classification, using the deterministic HashingEmbedder.
+
+Reports the GPT requests each makes and how many of the router's labels agree
+with the GPT-only labels, on paragraphs that each mention one topic.
+
+Run from document-intel/:  python -m benchmarks.bench_router
+"""
+import argparse
+import random
+import time
+from openai import AzureOpenAI
+from benchmarks.fake_openai import FakeOpenAI
+from pipeline import Document, DocumentProcessor
+from router import EmbeddingRouter, HashingEmbedder
+
+EXAMPLE = Document({
+    "Water": "Flood control projects at the port. Harbor and port infrastructure. Water and flood barriers.",
+    "Fire": "Wildfire response teams. New fire stations and fire trucks. Wildfire suppression.",
+    "Administrative": "Salaries and expenses of employees. Administrative support for staff. Employee training.",
+    "Other": "Grants for programs. Amounts appropriated for the fiscal year. General provisions.",
+})
+TOPICS = {
+    "Water": ["flood", "port", "harbor", "water"],
+    "Fire": ["wildfire", "fire", "stations", "suppression"],
+    "Administrative": ["salaries", "employee", "staff", "administrative"],
+    "Other": [],
+}
+FILLER = ["the", "shall", "fiscal", "year", "amount", "appropriated", "remain", "available",
+          "until", "expended", "for", "necessary", "expenses", "under", "this", "heading"]
+
+
+def topic_paragraphs(n, seed=0):
+    """Paragraphs of filler that each mention one topic's keywords (none for "Other") a few times"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(20, 60))]
+        keywords = TOPICS[rng.choice(list(TOPICS))]
+        for _ in range(rng.randint(1, 4) if keywords else 0):
+            words[rng.randrange(len(words))] = rng.choice(keywords)
+        texts.append(" ".join(words))
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--min-margin", type=float, nargs="+", default=[0.05, 0.2],
+                        help="router margins below which chunks still go to GPT")
+    args = parser.parse_args()
+
+    texts = topic_paragraphs(args.chunks)
+    with FakeOpenAI(latency=args.latency) as server:
+        client = AzureOpenAI(api_version="2024-08-01-preview", azure_endpoint=server.endpoint, api_key="fake")
+        processors = [("gpt only", DocumentProcessor(None, client, batch_tokens=0, max_concurrency=16))]
+        for min_margin in args.min_margin:
+            router = EmbeddingRouter(HashingEmbedder(), EXAMPLE, min_margin=min_margin)
+            processors.append((f"router {min_margin:g}",
+                               DocumentProcessor(None, client, batch_tokens=0, max_concurrency=16, router=router)))
+        baseline = None
+        for name, processor in processors:
+            requests = server.requests
+            start = time.perf_counter()
+            labels = processor.classify_chunks(texts)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or labels
+            agreement = sum(label == expected for label, expected in zip(labels, baseline)) / len(texts)
+            print(f"{name:11s} {elapsed:7.2f}s  gpt_requests={server.requests - requests:5d}  "
+                  f"agreement with gpt only={agreement:6.1%}  "
+                  f"labels={ {section: labels.count(section) for section in EXAMPLE.sections} }")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Table/paragraph overlap filtering: pairwise any() scan vs SpanIndex.
+
+Run from document-intel/:  python -m benchmarks.bench_spans
+"""
+import argparse
+import random
+import time
+from spans import SpanIndex
+
+
+def synthetic_layout(paragraphs, tables, seed=0):
+    """Paragraph spans tiling the content, with tables covering runs of them"""
+    rng = random.Random(seed)
+    para_spans, offset = [], 0
+    for _ in range(paragraphs):
+        length = rng.randint(20, 400)
+        para_spans.append((offset, offset + length))
+        offset += length + 1
+    table_spans = []
+    for start_para in rng.sample(range(paragraphs - 10), tables):
+        start = para_spans[start_para][0]
+        end = para_spans[start_para + rng.randint(0, 5)][1]
+        table_spans.append((start, end))
+    return para_spans, table_spans
+
+
+def pairwise(para_spans, table_spans):
+    return [
+        any((table_start <= start < table_end) or (table_start < end <= table_end)
+            for table_start, table_end in table_spans)
+        for start, end in para_spans
+    ]
+
+
+def indexed(para_spans, table_spans):
+    index = SpanIndex(table_spans)
+    return [index.overlaps(start, end) for start, end in para_spans]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--paragraphs", type=int, default=50000)
+    parser.add_argument("--tables", type=int, default=5000)
+    parser.add_argument("--pairwise-sample", type=int, default=2000,
+                        help="paragraphs timed with the pairwise scan (extrapolated to the full set)")
+    args = parser.parse_args()
+
+    para_spans, table_spans = synthetic_layout(args.paragraphs, args.tables)
+
+    start = time.perf_counter()
+    in_table = indexed(para_spans, table_spans)
+    indexed_time = time.perf_counter() - start
+
+    sample = para_spans[:args.pairwise_sample]
+    start = time.perf_counter()
+    pairwise_in_table = pairwise(sample, table_spans)
+    pairwise_time = (time.perf_counter() - start) * len(para_spans) / len(sample)
+
+    assert pairwise_in_table == in_table[:len(sample)]
+    print(f"{args.paragraphs} paragraphs, {args.tables} tables, {sum(in_table)} paragraphs in tables")
+    print(f"pairwise any():  {pairwise_time:8.3f}s (extrapolated from {len(sample)} paragraphs)")
+    print(f"SpanIndex:       {indexed_time:8.3f}s")
+    print(f"speedup:         {pairwise_time / indexed_time:8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Structural chunker: GPT requests and label consistency per section on a synthetic appropriations bill.
+
+Run from document-intel/:  python -m benchmarks.bench_structure --titles 6
+"""
+import argparse
+import random
+from azure.ai.documentintelligence.models import AnalyzeResult
+from openai import AzureOpenAI
+from benchmarks.fake_openai import FakeOpenAI
+from pipeline import DocumentProcessor
+from prefilter import PreFilter
+from structure import StructuralChunker
+
+TITLES = (("Water", "FLOOD CONTROL AND PORT INFRASTRUCTURE", ["flood", "port"]),
+          ("Fire", "WILDFIRE MANAGEMENT", ["wildfire"]),
+          ("Administrative", "SALARIES AND EXPENSES OF EMPLOYEES", ["employee", "salaries"]))
+FILLER = ["the", "shall", "fiscal", "year", "amount", "appropriated", "remain", "available",
+          "until", "expended", "for", "necessary", "expenses", "under", "this", "heading"]
+
+
+def synthetic_bill(titles, sections_per_title=8, seed=0):
+    """TITLE headings, "SEC. n." headings and body paragraphs that mostly only mention their topic in the heading.
+
+    Returns the layout result and the topic of every paragraph.
+    """
+    rng = random.Random(seed)
+    content, paragraphs, topics = "", [], []
+
+    def add(text, topic, role=None):
+        nonlocal content
+        paragraphs.append({"content": text, "role": role, "spans": [{"offset": len(content), "length": len(text)}]})
+        topics.append(topic)
+        content += text + "\n"
+
+    section = 100
+    for title in range(titles):
+        topic, name, keywords = TITLES[title % len(TITLES)]
+        add(f"TITLE {_roman(title + 1)}—{name}", topic, "sectionHeading")
+        for _ in range(sections_per_title):
+            section += 1
+            add(f"SEC. {section}. {name.title()}.", topic)
+            for _ in range(rng.randint(4, 20)):
+                words = [rng.choice(FILLER) for _ in range(rng.randint(20, 60))]
+                if rng.random() < 0.2:
+                    words[rng.randrange(len(words))] = rng.choice(keywords)
+                add(f"({rng.choice('abcdefgh')}) " + " ".join(words), topic)
+    return AnalyzeResult({"content": content, "paragraphs": paragraphs, "tables": [], "pages": []}), topics
+
+
+def _roman(number):
+    numerals = [(10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I")]
+    result = ""
+    for value, numeral in numerals:
+        while number >= value:
+            result += numeral
+            number -= value
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--titles", type=int, default=6)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--batch-tokens", type=int, nargs="+", default=[0, 3000],
+                        help="0 classifies one chunk (or block) per request")
+    args = parser.parse_args()
+
+    result, topics = synthetic_bill(args.titles)
+    # The pre-filter merges short "SEC. n." headings into the paragraph they lead;
+    # topics are tracked per chunk by the first paragraph each chunk starts with
+    starts = {paragraph["content"]: topic for paragraph, topic in zip(result.paragraphs, topics)}
+    with FakeOpenAI(latency=args.latency) as server:
+        client = AzureOpenAI(api_version="2024-08-01-preview", azure_endpoint=server.endpoint,
+                             api_key="fake", max_retries=0)
+        for batch_tokens in args.batch_tokens:
+            for name, structure in (("paragraphs", None), ("structure", StructuralChunker())):
+                processor = DocumentProcessor(None, client, max_concurrency=16, batch_tokens=batch_tokens,
+                                              prefilter=PreFilter(), structure=structure)
+                chunks = processor.extract_chunks(result, processor.prefilter.new_run())
+                texts = chunks.texts()
+                requests = server.requests
+                labels = processor.classify_chunks(texts, roles=chunks.roles())
+                expected = [starts[text.split("\n", 1)[0]] for text in texts]
+                agreement = sum(label == topic for label, topic in zip(labels, expected)) / len(texts)
+                print(f"batch_tokens={batch_tokens:<5d} {name:10s} chunks={len(texts):5d} "
+                      f"requests={server.requests - requests:5d}  labels matching the title's topic: {agreement:.0%}")
+
+
+if __name__ == "__main__":
+    main()
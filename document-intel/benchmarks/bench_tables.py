@@ -0,0 +1,88 @@
+"""Table materialization: per-position cell scan (old/analyze_bill.py) vs TableGrid.
+
+Run from document-intel/:  python -m benchmarks.bench_tables --rows 5000
+"""
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+from azure.ai.documentintelligence.models import DocumentTable
+from tables import TableGrid
+
+
+def synthetic_table(rows, columns, seed=0):
+    """Appropriations-style table: a header row, an account column and amount columns, some merged cells"""
+    rng = random.Random(seed)
+    cells = [{"rowIndex": 0, "columnIndex": column, "kind": "columnHeader", "content": f"FY{2000 + column}"}
+             for column in range(columns)]
+    for row in range(1, rows):
+        column = 0
+        while column < columns:
+            span = 2 if column and rng.random() < 0.02 and column + 1 < columns else 1
+            content = f"Account {row}" if column == 0 else f"${rng.randint(1, 10 ** 7):,}"
+            cell = {"rowIndex": row, "columnIndex": column, "content": content}
+            if span > 1:
+                cell["columnSpan"] = span
+            cells.append(cell)
+            column += span
+    return DocumentTable({"rowCount": rows, "columnCount": columns, "cells": cells})
+
+
+def scan(table, rows):
+    """The old extract_tables loop, over the first `rows` rows"""
+    found = 0
+    for row in range(rows):
+        for col in range(table.column_count):
+            cell = next((cell for cell in table.cells if cell.row_index == row and cell.column_index == col), None)
+            found += cell is not None
+    return found
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--scan-sample", type=int, default=20,
+                        help="rows timed with the per-position scan (extrapolated to the full table)")
+    args = parser.parse_args()
+
+    # Import the optional exporters up front so their import time isn't measured
+    for module in ("numpy", "pandas", "pyarrow.parquet"):
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+
+    table = synthetic_table(args.rows, args.columns)
+    print(f"{args.rows} rows x {args.columns} columns, {len(table.cells)} cells")
+
+    _, scan_time = timed(scan, table, args.scan_sample)
+    scan_time *= args.rows / args.scan_sample
+    grid, grid_time = timed(TableGrid.from_table, table)
+    print(f"cell scan (extrapolated) {scan_time:9.2f}s")
+    print(f"TableGrid.from_table     {grid_time:9.4f}s  ({scan_time / grid_time:,.0f}x)")
+
+    _, numpy_time = timed(grid.to_numpy)
+    print(f"to_numpy                 {numpy_time:9.4f}s")
+    _, csv_time = timed(grid.write_csv, io.StringIO())
+    print(f"write_csv                {csv_time:9.4f}s")
+    try:
+        _, pandas_time = timed(grid.to_pandas)
+        print(f"to_pandas                {pandas_time:9.4f}s")
+        with tempfile.TemporaryDirectory() as directory:
+            _, parquet_time = timed(grid.write_parquet, os.path.join(directory, "table.parquet"))
+        print(f"write_parquet            {parquet_time:9.4f}s")
+    except ImportError as e:
+        print(f"skipping pandas/parquet: {e}")
+
+
+if __name__ == "__main__":
+    main()
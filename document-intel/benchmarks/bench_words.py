@@ -0,0 +1,72 @@
+"""Word-to-line assignment: scanning every word per line (old/main2.py) vs WordIndex.
+
+Run from document-intel/:  python -m benchmarks.bench_words --words 5000
+"""
+import argparse
+import random
+import time
+from azure.ai.documentintelligence.models import DocumentPage
+from spans import WordIndex
+
+
+def synthetic_page(words, words_per_line=12, seed=0):
+    """Words tiling the page content, grouped into lines of about words_per_line words"""
+    rng = random.Random(seed)
+    page_words, lines, offset, line_start = [], [], 0, 0
+    for index in range(words):
+        length = rng.randint(1, 12)
+        page_words.append({"content": "w" * length, "confidence": 0.99, "polygon": [],
+                           "span": {"offset": offset, "length": length}})
+        offset += length + 1
+        if (index + 1) % words_per_line == 0 or index == words - 1:
+            lines.append({"content": "", "polygon": [],
+                          "spans": [{"offset": line_start, "length": offset - 1 - line_start}]})
+            line_start = offset
+    return DocumentPage({"pageNumber": 1, "spans": [], "words": page_words, "lines": lines})
+
+
+def in_span(word, spans):
+    for span in spans:
+        if word.span.offset >= span.offset and (
+            word.span.offset + word.span.length
+        ) <= (span.offset + span.length):
+            return True
+    return False
+
+
+def scan(page, lines):
+    return [[word for word in page.words if in_span(word, line.spans)] for line in lines]
+
+
+def indexed(page, lines):
+    index = WordIndex(page.words)
+    return [index.within(line.spans) for line in lines]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, default=5000)
+    parser.add_argument("--scan-sample", type=int, default=10,
+                        help="lines timed with the per-line scan (extrapolated to the whole page)")
+    args = parser.parse_args()
+
+    page = synthetic_page(args.words)
+    lines = page.lines
+
+    start = time.perf_counter()
+    sample = scan(page, lines[:args.scan_sample])
+    scan_time = (time.perf_counter() - start) * len(lines) / args.scan_sample
+
+    start = time.perf_counter()
+    words = indexed(page, lines)
+    index_time = time.perf_counter() - start
+
+    assert [[w.span.offset for w in line] for line in sample] == \
+        [[w.span.offset for w in line] for line in words[:args.scan_sample]]
+    print(f"{args.words} words, {len(lines)} lines")
+    print(f"scan (extrapolated) {scan_time:8.2f}s")
+    print(f"WordIndex           {index_time:8.4f}s  ({scan_time / index_time:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Local stand-in for the Document Intelligence analyze long-running operation.
+
+POST .../documentModels/{model}:analyze answers 202 with an Operation-Location,
+and GET .../analyzeResults/{id} reports "running" until the operation's
+latency (randomized by +/- jitter) has passed, then "succeeded" with the
+layout built by `responder(body, pages)`. Point a sync or aio
+DocumentIntelligenceClient at `server.endpoint` to use it.
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def empty_layout(body, pages):
+    return {"content": "", "pages": [], "paragraphs": [], "tables": []}
+
+
+class FakeDocumentIntelligence(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency=2.0, jitter=0.5, responder=empty_layout, retry_after=None, port=0, seed=0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.responder = responder
+        self.retry_after = retry_after
+        self.analyses = 0
+        self.polls = 0
+        self._random = random.Random(seed)
+        self._operations = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+    def start(self, body, pages):
+        """Register an operation and return its id"""
+        with self._lock:
+            self.analyses += 1
+            latency = self.latency * (1 + self._random.uniform(-self.jitter, self.jitter))
+            operation = uuid.uuid4().hex
+            self._operations[operation] = (time.monotonic() + latency, body, pages)
+        return operation
+
+    def poll(self, operation):
+        """(done, layout) for an operation, or None if it is unknown"""
+        with self._lock:
+            self.polls += 1
+            entry = self._operations.get(operation)
+        if entry is None:
+            return None
+        ready_at, body, pages = entry
+        if time.monotonic() < ready_at:
+            return False, None
+        return True, self.responder(body, pages)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        url = urlsplit(self.path)
+        body = self.rfile.read(int(self.headers.get("content-length", 0)))
+        if not url.path.endswith(":analyze"):
+            return self._send(404, {"error": {"code": "NotFound", "message": "not found"}})
+        query = parse_qs(url.query)
+        operation = server.start(body, query.get("pages", [None])[0])
+        model = url.path.rsplit("/", 1)[-1].split(":")[0]
+        location = (f"{server.endpoint}/documentintelligence/documentModels/{model}/analyzeResults/"
+                    f"{operation}?{url.query}")
+        self._send(202, None, {"operation-location": location, **self._retry_after()})
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        operation = url.path.rsplit("/", 1)[-1]
+        polled = server.poll(operation) if "/analyzeResults/" in url.path else None
+        if polled is None:
+            return self._send(404, {"error": {"code": "NotFound", "message": "not found"}})
+        done, layout = polled
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        payload = {"status": "succeeded" if done else "running",
+                   "createdDateTime": now, "lastUpdatedDateTime": now}
+        if done:
+            payload["analyzeResult"] = {"apiVersion": "2024-07-31-preview", "modelId": "prebuilt-layout",
+                                        "stringIndexType": "textElements", **layout}
+        self._send(200, payload, {} if done else self._retry_after())
+
+    def _retry_after(self):
+        if self.server.retry_after is None:
+            return {}
+        return {"retry-after": str(self.server.retry_after)}
+
+    def _send(self, status, payload, headers=None):
+        data = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
@@ -0,0 +1,180 @@
+"""Local stand-in for the Azure OpenAI chat completions endpoint.
+
+Answers every POST .../chat/completions with a canned completion (and
+.../embeddings with hashed bag-of-words vectors) after an injected delay, and can return 429s so the client backoff path gets exercised,
+either at random or by enforcing an RPM/TPM quota over a sliding `period`
+the way Azure does (prompt tokens plus max_tokens are charged on admission).
+Point an AzureOpenAI client at `server.endpoint` to use it.
+"""
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+KEYWORDS = (("Water", ("flood", "port", "water")),
+            ("Fire", ("fire", "wildfire")),
+            ("Administrative", ("employee", "salar", "administrative")))
+
+
+def keyword_section(text):
+    """Pick a section the way a cheap model might: first keyword wins"""
+    text = text.lower()
+    for section, words in KEYWORDS:
+        if any(word in text for word in words):
+            return section
+    return "Other"
+
+
+def keyword_responder(messages):
+    """Answer single-chunk prompts with a section name and batched prompts with JSON labels"""
+    prompt = messages[-1]["content"]
+    if "Chunks:" in prompt:
+        chunks = re.findall(r"^\[(\d+)\] (.*)$", prompt, re.MULTILINE)
+        return json.dumps({"labels": [
+            {"index": int(index), "section": keyword_section(text)} for index, text in chunks
+        ]})
+    return keyword_section(prompt.split("Text:")[-1])
+
+
+class FakeOpenAI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency=0.1, rate_limit_prob=0.0, responder=keyword_responder, port=0,
+                 rpm=None, tpm=None, period=60.0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.rate_limit_prob = rate_limit_prob
+        self.rpm = rpm
+        self.tpm = tpm
+        self.period = period
+        self._admitted = deque()  # (time, charged tokens) inside the current window
+        self.responder = responder
+        self.requests = 0
+        self.rate_limited = 0
+        self.prompt_tokens = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+    def admit(self, charged_tokens):
+        """Charge a request against the quota; return None or seconds until it would fit"""
+        with self._lock:
+            now = time.monotonic()
+            while self._admitted and self._admitted[0][0] <= now - self.period:
+                self._admitted.popleft()
+            tokens = sum(charged for _, charged in self._admitted)
+            if ((self.rpm and len(self._admitted) + 1 > self.rpm)
+                    or (self.tpm and tokens + charged_tokens > self.tpm)):
+                if not self._admitted:
+                    return self.period
+                return self._admitted[0][0] + self.period - now
+            self._admitted.append((now, charged_tokens))
+            return None
+
+    def count(self, rate_limited=False, prompt_tokens=0):
+        with self._lock:
+            self.requests += 1
+            self.rate_limited += rate_limited
+            self.prompt_tokens += prompt_tokens
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))))
+        if self.path.split("?")[0].endswith("/embeddings"):
+            return self._embeddings(body)
+        if not self.path.split("?")[0].endswith("/chat/completions"):
+            return self._send(404, {"error": {"message": "not found"}})
+
+        prompt_tokens = sum(len(m["content"]) for m in body["messages"]) // 4
+        retry_after = server.admit(prompt_tokens + (body.get("max_tokens") or 0))
+        if retry_after is not None:
+            server.count(rate_limited=True)
+            return self._send(429, {"error": {"code": "429", "message": "Rate limit is exceeded"}},
+                              {"retry-after-ms": str(max(1, int(retry_after * 1000)))})
+
+        time.sleep(server.latency)
+        if random.random() < server.rate_limit_prob:
+            server.count(rate_limited=True)
+            return self._send(429, {"error": {"code": "429", "message": "Rate limit"}},
+                              {"retry-after-ms": "50"})
+
+        server.count(prompt_tokens=prompt_tokens)
+        content = server.responder(body["messages"])
+        self._send(200, {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o-mini"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4,
+            },
+        })
+
+    def _embeddings(self, body):
+        """Hashed bag-of-words vectors, charged against the same quota as completions"""
+        server = self.server
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        prompt_tokens = sum(len(text) for text in inputs) // 4
+        retry_after = server.admit(prompt_tokens)
+        if retry_after is not None:
+            server.count(rate_limited=True)
+            return self._send(429, {"error": {"code": "429", "message": "Rate limit is exceeded"}},
+                              {"retry-after-ms": str(max(1, int(retry_after * 1000)))})
+        time.sleep(server.latency)
+        server.count(prompt_tokens=prompt_tokens)
+        self._send(200, {
+            "object": "list",
+            "model": body.get("model", "text-embedding-3-small"),
+            "data": [{"object": "embedding", "index": index, "embedding": _hashed_vector(text)}
+                     for index, text in enumerate(inputs)],
+            "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+        })
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _hashed_vector(text, dimensions=64):
+    vector = [0.0] * dimensions
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        h = zlib.crc32(word.encode("utf-8"))
+        vector[h % dimensions] += 1.0 if h & 0x80000000 else -1.0
+    return vector
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import threading
+from chunks import ChunkStore
+
+
+class RunCheckpoint:
+    """Append-only JSONL record of the finished work of one document's pipeline run.
+
+    The run directory holds chunks.jsonl (extracted chunks per page range, with
+    what the pre-filter counted and indexed in the range),
+    labels.jsonl (section per chunk, keyed by a hash of the chunk text) and
+    sections.jsonl (generated sections). Passing the same directory to a later
+    run skips everything already recorded. A line cut short by a crash is ignored.
+    settings (e.g. DocumentProcessor.checkpoint_settings()) are recorded with
+    the file hash, and a run with different settings is refused, since its
+    chunks and labels would not match the ones on disk.
+    """
+
+    def __init__(self, run_dir, pdf_path, pages_per_range=None, settings=None):
+        self.run_dir = run_dir
+        os.makedirs(run_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._check_manifest({
+            "pdf_sha256": _sha256(pdf_path),
+            "pages_per_range": pages_per_range,
+            "settings": settings,
+        })
+        self._chunks, self._prefilter = {}, {}
+        for record in self._load("chunks"):
+            self._chunks[record["pages"]] = ChunkStore.from_dict(record["chunks"])
+            self._prefilter[record["pages"]] = record.get("prefilter")
+        self._labels = {record["chunk"]: record["section"] for record in self._load("labels")}
+        self._sections = {record["section"]: record["content"] for record in self._load("sections")}
+
+    def chunks(self, pages):
+        """ChunkStore recorded for a page range (None for the whole document), or None"""
+        return self._chunks.get(pages)
+
+    def prefilter(self, pages):
+        """PreFilterRun.changes() recorded with a page range's chunks, or None"""
+        return self._prefilter.get(pages)
+
+    def record_chunks(self, pages, chunks, prefilter=None):
+        self._chunks[pages] = chunks
+        self._prefilter[pages] = prefilter
+        self._append("chunks", [{"pages": pages, "chunks": chunks.to_dict(), "prefilter": prefilter}])
+
+    def label(self, text):
+        return self._labels.get(_chunk_id(text))
+
+    def record_labels(self, labelled):
+        """Record an iterable of (text, section) pairs"""
+        records = [{"chunk": _chunk_id(text), "section": section} for text, section in labelled]
+        with self._lock:
+            for record in records:
+                self._labels[record["chunk"]] = record["section"]
+        self._append("labels", records)
+
+    def section(self, name):
+        return self._sections.get(name)
+
+    def record_section(self, name, content):
+        with self._lock:
+            self._sections[name] = content
+        self._append("sections", [{"section": name, "content": content}])
+
+    def stats(self):
+        return {"ranges": len(self._chunks), "labels": len(self._labels), "sections": len(self._sections)}
+
+    def _path(self, name):
+        return os.path.join(self.run_dir, f"{name}.jsonl")
+
+    def _load(self, name):
+        try:
+            with open(self._path(name), "rb+") as f:
+                data = f.read()
+                complete = data.rfind(b"\n") + 1
+                if complete < len(data):
+                    # Drop a partial last line from an interrupted write so appends start clean
+                    f.truncate(complete)
+        except FileNotFoundError:
+            return []
+        return [json.loads(line) for line in data[:complete].decode("utf-8").splitlines()]
+
+    def _append(self, name, records):
+        data = "".join(json.dumps(record) + "\n" for record in records)
+        with self._lock, open(self._path(name), "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _check_manifest(self, manifest):
+        path = os.path.join(self.run_dir, "run.json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                recorded = json.load(f)
+            if recorded != manifest:
+                raise ValueError(f"{self.run_dir} holds a run for a different file, page split or "
+                                 f"pre-filter/structure settings")
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+
+def _chunk_id(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
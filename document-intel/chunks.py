@@ -0,0 +1,121 @@
+from array import array
+from collections.abc import Sequence
+
+
+class Chunk:
+    """Read-only view of one chunk in a ChunkStore"""
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    @property
+    def text(self):
+        return self._store.text(self._index)
+
+    @property
+    def role(self):
+        return self._store.role(self._index)
+
+    def __repr__(self):
+        return f"Chunk(role={self.role!r}, text={self.text[:40]!r})"
+
+
+class ChunkStore:
+    """Columnar store of (text, role) chunks.
+
+    Texts are UTF-8 encoded into one growing buffer addressed by an array of end
+    offsets, and roles are interned to one-byte codes, so a chunk costs about
+    its encoded text plus 9 bytes instead of a dict and a str object per chunk.
+    Texts are decoded again on access.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._ends = array("Q")
+        self._codes = array("B")
+        self._roles = []
+        self._role_codes = {}
+
+    def append(self, text, role=None):
+        code = self._role_codes.get(role)
+        if code is None:
+            code = self._role_codes[role] = len(self._roles)
+            self._roles.append(role)
+        self._buffer += text.encode("utf-8")
+        self._ends.append(len(self._buffer))
+        self._codes.append(code)
+
+    def __len__(self):
+        return len(self._ends)
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        return Chunk(self, index % len(self))
+
+    def __iter__(self):
+        return (Chunk(self, index) for index in range(len(self)))
+
+    def text(self, index):
+        start = self._ends[index - 1] if index else 0
+        return self._buffer[start:self._ends[index]].decode("utf-8")
+
+    def role(self, index):
+        return self._roles[self._codes[index]]
+
+    def text_view(self):
+        """The texts as a lazy sequence, decoded on access instead of held as str objects"""
+        return TextView(self, range(len(self)))
+
+    def texts(self):
+        buffer = memoryview(self._buffer)
+        starts = [0, *self._ends[:-1]]
+        return [str(buffer[start:end], "utf-8") for start, end in zip(starts, self._ends)]
+
+    def roles(self):
+        return [self._roles[code] for code in self._codes]
+
+    def to_dict(self):
+        """JSON-serializable form, inverted by from_dict"""
+        return {
+            "buffer": self._buffer.decode("utf-8"),
+            "ends": self._ends.tolist(),
+            "codes": self._codes.tolist(),
+            "roles": self._roles,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        store = cls()
+        store._buffer = bytearray(data["buffer"].encode("utf-8"))
+        store._ends = array("Q", data["ends"])
+        store._codes = array("B", data["codes"])
+        store._roles = list(data["roles"])
+        store._role_codes = {role: code for code, role in enumerate(store._roles)}
+        return store
+
+
+
+class TextView(Sequence):
+    """Texts of selected chunks of a ChunkStore, decoded each time they are accessed"""
+
+    __slots__ = ("_store", "_indices")
+
+    def __init__(self, store, indices):
+        self._store = store
+        self._indices = indices
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return TextView(self._store, self._indices[index])
+        return self._store.text(self._indices[index])
+
+    def select(self, positions):
+        """View of the texts at the given positions of this view"""
+        return TextView(self._store, [self._indices[position] for position in positions])
@@ -0,0 +1,95 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from azure.ai.documentintelligence.models import AnalyzeResult
+from metrics import REGISTRY
+
+CACHE_LOOKUPS = REGISTRY.counter("cache_lookups_total", "Cache lookups by cache and result")
+
+
+class LayoutCache:
+    """Persistent cache of Document Intelligence results keyed by file content.
+
+    Entries are gzipped JSON files named after the SHA-256 of the document plus
+    the model ID and API version. Reading an entry bumps its mtime, and the least
+    recently used entries are evicted once the directory grows past max_bytes.
+    """
+
+    def __init__(self, directory=".layout_cache", max_bytes=2 * 1024 ** 3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._digests = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, pdf_path, model_id, api_version, **options):
+        """Cache key for a file analyzed with the given model, API version and options"""
+        options = {name: value for name, value in options.items() if value is not None}
+        params = json.dumps([model_id, api_version, options], sort_keys=True)
+        digest = hashlib.sha256(self._file_digest(pdf_path))
+        digest.update(params.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _file_digest(self, pdf_path):
+        """SHA-256 of the file, remembered per (path, size, mtime) so page ranges hash it once"""
+        stat = os.stat(pdf_path)
+        file_id = (os.path.abspath(pdf_path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._digests.get(file_id)
+        if cached is not None:
+            return cached
+        digest = hashlib.sha256()
+        with open(pdf_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        with self._lock:
+            self._digests[file_id] = digest.digest()
+        return digest.digest()
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                result = AnalyzeResult(json.load(f))
+        except (FileNotFoundError, OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            CACHE_LOOKUPS.inc(cache="layout", result="miss")
+            return None
+        os.utime(path)
+        with self._lock:
+            self.hits += 1
+        CACHE_LOOKUPS.inc(cache="layout", result="hit")
+        return result
+
+    def put(self, key, result):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(result.as_dict(), f)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json.gz")
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".json.gz"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
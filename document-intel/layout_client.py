@@ -0,0 +1,104 @@
+import asyncio
+import os
+import threading
+from azure.ai.documentintelligence.aio import DocumentIntelligenceClient
+from azure.core.credentials import AzureKeyCredential
+from azure.core.polling.async_base_polling import AsyncLROBasePolling
+from azure.core.polling.base_polling import get_retry_after
+from metrics import REGISTRY
+
+LAYOUT_POLLS = REGISTRY.counter("layout_polls_total", "Status requests made while waiting for layout analyses")
+
+
+class BackoffPolling(AsyncLROBasePolling):
+    """LRO polling that first checks after interval seconds and then backs off by backoff up to max_interval.
+
+    Small documents finish within a poll or two, while a long analysis costs a
+    handful of status requests instead of one per second. A Retry-After from
+    the service is respected as a lower bound.
+    """
+
+    def __init__(self, interval=1.0, backoff=1.5, max_interval=10.0, **kwargs):
+        super().__init__(interval, **kwargs)
+        self._interval = interval
+        self._backoff = backoff
+        self._max_interval = max_interval
+
+    def _extract_delay(self):
+        delay = max(self._interval, get_retry_after(self._pipeline_response) or 0)
+        self._interval = min(self._interval * self._backoff, self._max_interval)
+        LAYOUT_POLLS.inc()
+        return delay
+
+
+class AsyncLayoutClient:
+    """Document Intelligence analyses on the aio client, with up to max_in_flight operations at once.
+
+    The client runs on an event loop in a daemon thread, so starting an analysis
+    costs no thread of its own while it polls. begin_analyze_file returns a
+    concurrent.futures.Future of the AnalyzeResult, which DocumentProcessor
+    waits on like a poller.
+    """
+
+    def __init__(self, endpoint, credential, max_in_flight=32, polling_interval=1.0,
+                 polling_backoff=1.5, max_polling_interval=10.0, **client_kwargs):
+        self.max_in_flight = max_in_flight
+        self.polling_interval = polling_interval
+        self.polling_backoff = polling_backoff
+        self.max_polling_interval = max_polling_interval
+        self._client = DocumentIntelligenceClient(endpoint, credential, **client_kwargs)
+        self.api_version = self._client._config.api_version
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="layout-client", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_env(cls):
+        """Client for AZURE_ENDPOINT / AZURE_API_KEY, tuned by DOCINTEL_MAX_IN_FLIGHT and DOCINTEL_POLL_INTERVAL"""
+        return cls(
+            os.getenv("AZURE_ENDPOINT"),
+            AzureKeyCredential(os.getenv("AZURE_API_KEY")),
+            max_in_flight=int(os.getenv("DOCINTEL_MAX_IN_FLIGHT", "32")),
+            polling_interval=float(os.getenv("DOCINTEL_POLL_INTERVAL", "1")),
+            max_polling_interval=float(os.getenv("DOCINTEL_MAX_POLL_INTERVAL", "10")),
+        )
+
+    def begin_analyze_file(self, model_id, pdf_path, **kwargs):
+        """Start analyzing a file and return a Future of its AnalyzeResult.
+
+        The file is only opened once one of the max_in_flight slots is free, and
+        is streamed as the request body, so queued analyses hold no file data.
+        """
+        return asyncio.run_coroutine_threadsafe(self._analyze(model_id, pdf_path, kwargs), self._loop)
+
+    async def _analyze(self, model_id, pdf_path, kwargs):
+        async with self._semaphore:
+            with open(pdf_path, "rb") as doc:
+                poller = await self._client.begin_analyze_document(
+                    model_id,
+                    doc,
+                    content_type="application/octet-stream",
+                    polling=BackoffPolling(self.polling_interval, self.polling_backoff, self.max_polling_interval),
+                    **kwargs,
+                )
+            return await poller.result()
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    async def _shutdown(self):
+        # Analyses nobody waited for (e.g. prefetched for a document that failed) are abandoned
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
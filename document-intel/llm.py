@@ -0,0 +1,161 @@
+import json
+import random
+import time
+from completion_cache import cache_key
+from metrics import REGISTRY
+from openai import APIConnectionError, InternalServerError, RateLimitError
+from tokens import count_tokens
+
+
+LLM_REQUESTS = REGISTRY.counter("llm_requests_total", "Chat completion and embedding requests sent, by model and outcome")
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "Tokens reported in chat completion and embedding usage, by model and kind")
+CACHE_LOOKUPS = REGISTRY.counter("cache_lookups_total", "Cache lookups by cache and result")
+
+
+class ChatClient:
+    """Wraps an (Azure)OpenAI client so every pipeline stage shares one retry policy.
+
+    The SDK's own retries are turned off: a 429 it retried would sleep inside a
+    limiter slot without the limiter ever hearing of it, so ChatClient does all
+    retrying itself, of 429s, connection errors and 5xx responses alike.
+    """
+
+    def __init__(self, openai_client, max_retries=6, base_delay=1.0, max_delay=60.0, cache=None,
+                 limiter=None):
+        if hasattr(openai_client, "with_options"):
+            openai_client = openai_client.with_options(max_retries=0)
+        self.openai_client = openai_client
+        self.cache = cache
+        # A ratelimit.RateLimiter shared by every stage (and every ChatClient) on the
+        # same deployment, so together they stay under its RPM/TPM quota
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def wrap(cls, client):
+        """Accept either a raw OpenAI client or an already configured ChatClient"""
+        return client if isinstance(client, cls) else cls(client)
+
+    def complete(self, messages, model="gpt-4o-mini", **params):
+        """Send a chat completion and return the stripped message content.
+
+        429s are retried with exponential backoff (honouring retry-after when
+        the service sends one) instead of failing the whole run. When a cache
+        is configured, identical (model, messages, params) requests are served
+        from it without touching the network.
+        """
+        key = None
+        if self.cache is not None:
+            key = cache_key(model, messages, params)
+            cached = self.cache.get(key)
+            CACHE_LOOKUPS.inc(cache="completion", result="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
+
+        estimated = estimate_request_tokens(messages, params)
+        response = self._send(
+            model, estimated,
+            lambda: self.openai_client.chat.completions.create(model=model, messages=messages, **params),
+        )
+        if response.usage is not None:
+            LLM_TOKENS.inc(response.usage.prompt_tokens, model=model, kind="prompt")
+            LLM_TOKENS.inc(response.usage.completion_tokens, model=model, kind="completion")
+        content = response.choices[0].message.content.strip()
+        if key is not None:
+            self.cache.set(key, content)
+        return content
+
+    def embed(self, inputs, model="text-embedding-3-small"):
+        """Embed a list of texts, with the same 429 backoff and rate limiter as completions.
+
+        With a cache, each text's vector is cached on its own (keyed by model
+        and text), and only the texts missing from it are sent.
+        """
+        vectors = [None] * len(inputs)
+        keys = {}
+        if self.cache is not None:
+            for position, text in enumerate(inputs):
+                key = cache_key(model, [text], {"endpoint": "embeddings"})
+                cached = self.cache.get(key)
+                CACHE_LOOKUPS.inc(cache="embedding", result="miss" if cached is None else "hit")
+                if cached is None:
+                    keys[position] = key
+                else:
+                    vectors[position] = json.loads(cached)
+        missing = [position for position, vector in enumerate(vectors) if vector is None]
+        if not missing:
+            return vectors
+
+        texts = [inputs[position] for position in missing]
+        estimated = sum(count_tokens(text) for text in texts)
+        response = self._send(model, estimated, lambda: self.openai_client.embeddings.create(model=model, input=texts))
+        if response.usage is not None:
+            LLM_TOKENS.inc(response.usage.prompt_tokens, model=model, kind="prompt")
+        for item in response.data:
+            position = missing[item.index]
+            vectors[position] = item.embedding
+            if position in keys:
+                self.cache.set(keys[position], json.dumps(item.embedding))
+        return vectors
+
+    def _send(self, model, estimated_tokens, create):
+        """Call create() under the limiter, retrying 429s and transient errors; returns the response"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                if self.limiter is None:
+                    response = create()
+                else:
+                    with self.limiter.acquire(estimated_tokens):
+                        response = create()
+                LLM_REQUESTS.inc(model=model, outcome="ok")
+                if self.limiter is not None:
+                    used = response.usage.total_tokens if response.usage is not None else None
+                    self.limiter.on_success(estimated_tokens, used)
+                return response
+            except RateLimitError as e:
+                LLM_REQUESTS.inc(model=model, outcome="rate_limited")
+                delay = self._retry_delay(e, attempt)
+                if self.limiter is not None:
+                    # Pauses every caller sharing the limiter and halves its concurrency
+                    self.limiter.on_rate_limited(delay)
+                if attempt == self.max_retries:
+                    raise
+                if self.limiter is None:
+                    time.sleep(delay)
+            except (APIConnectionError, InternalServerError):
+                # What the SDK used to retry besides 429s; these say nothing about the quota
+                LLM_REQUESTS.inc(model=model, outcome="error")
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(min(self.base_delay * (2 ** attempt), self.max_delay) * random.uniform(0.5, 1.0))
+
+    def _retry_delay(self, error, attempt):
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        delay = min(self.base_delay * (2 ** attempt), self.max_delay)
+        return delay * random.uniform(0.5, 1.0)
+
+
+def estimate_request_tokens(messages, params):
+    """Tokens Azure OpenAI charges against TPM up front: the prompt plus max_tokens"""
+    prompt = sum(count_tokens(message["content"]) + 4 for message in messages)
+    return prompt + (params.get("max_tokens") or 0)
+
+
+def _retry_after_seconds(error):
+    """Read retry-after-ms / retry-after from a 429 response, if present"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
@@ -7,6 +7,11 @@ from azure.ai.documentintelligence.models import AnalyzeResult
 from azure.ai.documentintelligence.models import AnalyzeDocumentRequest
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
+import sys
+
+# The shared table helpers live in document-intel/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tables import TableGrid
 
 load_dotenv()
 
@@ -60,11 +65,12 @@ def extract_tables(result):
     print("Extracted Tables:")
     for table_idx, table in enumerate(result.tables):
         print(f"Table {table_idx + 1}:")
-        for row in range(table.row_count):
-            for col in range(table.column_count):
-                cell = next((cell for cell in table.cells if cell.row_index == row and cell.column_index == col), None)
-                if cell:
-                    print(f"[{row}][{col}]: {cell.content}")
+        # One pass over the cells instead of a scan of every cell per (row, col)
+        grid = TableGrid.from_table(table, fill_spans=False)
+        for row, contents in enumerate(grid.rows()):
+            for col, content in enumerate(contents):
+                if content is not None:
+                    print(f"[{row}][{col}]: {content}")
             print()
         print("---")
 
@@ -2,8 +2,14 @@ from azure.ai.documentintelligence import DocumentIntelligenceClient
 from azure.core.credentials import AzureKeyCredential
 from openai import AzureOpenAI
 import os
+import sys
 from dotenv import load_dotenv
 
+# The shared LLM client and rate limiter live in document-intel/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm import ChatClient
+from ratelimit import default_limiter
+
 load_dotenv()
 
 endpoint = os.getenv("AZURE_ENDPOINT")
@@ -32,8 +38,10 @@ class DocumentProcessor:
         )
         self.openai_client = AzureOpenAI(
             api_key=openai_key,
-            api_base=openai_endpoint
+            api_base=openai_endpoint,
+            max_retries=0
         )
+        self.llm = ChatClient(self.openai_client, limiter=default_limiter())
         
     def process_document(self, document_path):
         # Use Document Intelligence to extract content
@@ -69,11 +77,10 @@ class DocumentProcessor:
     def generate_summary(self, section_content, section_type):
         # Generate summary using Azure OpenAI
         prompt = self._get_section_prompt(section_type, section_content)
-        response = self.openai_client.chat.completions.create(
+        return self.llm.complete(
             model="gpt-4",  # or your deployed model name
             messages=[
                 {"role": "system", "content": "You are a document summarization assistant."},
                 {"role": "user", "content": prompt}
             ]
-        )
-        return response.choices[0].message.content
\ No newline at end of file
+        )
\ No newline at end of file
@@ -5,6 +5,11 @@ from azure.core.credentials import AzureKeyCredential
 from azure.ai.documentintelligence import DocumentIntelligenceClient
 from azure.ai.documentintelligence.models import AnalyzeResult
 from azure.ai.documentintelligence.models import AnalyzeDocumentRequest
+import sys
+
+# The shared span helpers live in document-intel/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from spans import WordIndex
 
 load_dotenv()
 
@@ -13,21 +18,11 @@ key = os.getenv("AZURE_API_KEY")
 
 # helper functions
 
-def get_words(page, line):
-    result = []
-    for word in page.words:
-        if _in_span(word, line.spans):
-            result.append(word)
-    return result
-
-
-def _in_span(word, spans):
-    for span in spans:
-        if word.span.offset >= span.offset and (
-            word.span.offset + word.span.length
-        ) <= (span.offset + span.length):
-            return True
-    return False
+def get_words(page, line, index=None):
+    """Words of the page inside the line's spans; pass a WordIndex to reuse it across lines"""
+    if index is None:
+        index = WordIndex(page.words or [])
+    return index.within(line.spans)
 
 
 def analyze_layout():
@@ -56,8 +51,10 @@ def analyze_layout():
         )
 
         if page.lines:
+            # Built once per page; each line's words are then a bisect range lookup
+            word_index = WordIndex(page.words or [])
             for line_idx, line in enumerate(page.lines):
-                words = get_words(page, line)
+                words = get_words(page, line, word_index)
                 print(
                     f"...Line # {line_idx} has word count {len(words)} and text '{line.content}' "
                     f"within bounding polygon '{line.polygon}'"
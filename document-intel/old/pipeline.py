@@ -3,8 +3,14 @@ from azure.ai.documentintelligence import DocumentIntelligenceClient
 from azure.core.credentials import AzureKeyCredential
 from openai import AzureOpenAI
 import os
+import sys
 from dotenv import load_dotenv
 
+# The shared LLM client and rate limiter live in document-intel/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm import ChatClient
+from ratelimit import default_limiter
+
 load_dotenv()
 
 class DocumentProcessor:
@@ -22,8 +28,10 @@ class DocumentProcessor:
         # Initialize Azure OpenAI
         self.openai_client = AzureOpenAI(
             api_key=openai_key,
-            api_base=openai_endpoint
+            api_base=openai_endpoint,
+            max_retries=0
         )
+        self.llm = ChatClient(self.openai_client, limiter=default_limiter())
     
     def process_documents(self, document_paths: List[str]) -> Dict[str, str]:
         """Main pipeline to process documents and generate summaries"""
@@ -78,7 +86,7 @@ class DocumentProcessor:
 
         Return only the category name, nothing else."""
         
-        response = self.openai_client.chat.completions.create(
+        response = self.llm.complete(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are a document classification assistant."},
@@ -88,7 +96,7 @@ class DocumentProcessor:
             max_tokens=10
         )
         
-        return response.choices[0].message.content.strip().lower()
+        return response.lower()
 
     def classify_sections(self, content_blocks: List[dict]) -> Dict[str, List[str]]:
         """Group content blocks into sections by type"""
@@ -152,7 +160,7 @@ class DocumentProcessor:
 
     def generate_summary(self, prompt: str) -> str:
         """Generate summary using Azure OpenAI"""
-        response = self.openai_client.chat.completions.create(
+        return self.llm.complete(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are a document summarization assistant."},
@@ -161,8 +169,6 @@ class DocumentProcessor:
             temperature=0.7,
             max_tokens=1000
         )
-        
-        return response.choices[0].message.content.strip()
 
 def print_summaries(summaries: Dict[str, str]):
     """Print summaries in a readable format"""
@@ -1,10 +1,24 @@
-import base64
-from azure.ai.documentintelligence import DocumentIntelligenceClient
-from azure.core.credentials import AzureKeyCredential
+import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from openai import AzureOpenAI
 from typing import List, Dict
 from dotenv import load_dotenv
+from checkpoint import RunCheckpoint
+from chunks import ChunkStore, TextView
+from completion_cache import SQLiteCache
+from layout_cache import LayoutCache
+from layout_client import AsyncLayoutClient
+from llm import ChatClient
+from ratelimit import default_limiter
+from metrics import REGISTRY, span
+from prefilter import PreFilter, word_confidence
+from spans import SpanIndex
+from structure import StructuralChunker
+from tables import TableGrid
+from tokens import count_tokens, pack_batches, split_text
 import os
 
 load_dotenv()
@@ -14,135 +28,493 @@ load_dotenv()
 # Section 2: Fire (wildfires, fire stations)
 # Section 3: Administrative (employees, establishments, admin supprt, etc.)
 # Section 4: Other (anything else)
+SECTIONS = {
+    "Water": "floods, ports",
+    "Fire": "wildfires, fire stations",
+    "Administrative": "employees, establishments, admin support, etc.",
+    "Other": "anything else",
+}
+SECTION_OPTIONS = "\n".join(f"        - {name} ({hint})" for name, hint in SECTIONS.items())
 
 class Document:
-    def __init__(self, sections: Dict[str, str]):
+    def __init__(self, sections: Dict[str, str], stats: Dict[str, int] = None):
         self.sections = sections
+        # Processing counts, e.g. chunks the pre-filter kept out of classification
+        self.stats = stats or {}
 
 
 class DocumentProcessor:
-    def __init__(self, doc_client, openai_client):
+    def __init__(self, doc_client, openai_client, max_concurrency=8,
+                 batch_tokens=3000, batch_size=40, layout_cache=None,
+                 layout_model="prebuilt-layout", pages_per_range=None, range_prefetch=2,
+                 section_tokens=12000, summary_tokens=1000, router=None, prefilter=None,
+                 structure=None):
         self.doc_client = doc_client
-        self.openai_client = openai_client
-
-    def process_document(self, pdf_path, example_document):
-        """Extract text from a PDF file"""
-        with open(pdf_path, "rb") as doc:
-            file_content = doc.read()
-            file_content_base64 = base64.b64encode(file_content).decode("utf-8")
+        self.layout_cache = layout_cache
+        self.layout_model = layout_model
+        # When pages_per_range is set, large PDFs are analyzed in page ranges with up
+        # to range_prefetch ranges in flight, and classification starts per range.
+        self.pages_per_range = pages_per_range
+        self.range_prefetch = range_prefetch
+        # Layout analyses started ahead of process_document by prefetch_layout
+        self._prefetched = {}
+        self._prefetch_lock = threading.Lock()
+        self.llm = ChatClient.wrap(openai_client)
+        self.max_concurrency = max_concurrency
+        # Optional router.EmbeddingRouter that labels chunks locally before any GPT call
+        self.router = router
+        # Optional prefilter.PreFilter that drops boilerplate paragraphs before classification
+        self.prefilter = prefilter
+        # Optional structure.StructuralChunker that groups chunks under their headings
+        # so each block is classified once and its chunks inherit the label
+        self.structure = structure
+        # Chunks are classified in batches of up to batch_tokens / batch_size;
+        # batch_tokens=0 falls back to one request per chunk.
+        self.batch_tokens = batch_tokens
+        self.batch_size = batch_size
+        # Source material for one generation prompt is capped at section_tokens; larger
+        # sections are map-reduced into summaries of at most summary_tokens each.
+        # A batch can be as little as half full, so only summaries under half the
+        # budget are guaranteed to shrink the material on every pass.
+        if 2 * summary_tokens >= section_tokens:
+            raise ValueError("summary_tokens must be less than half of section_tokens")
+        self.section_tokens = section_tokens
+        self.summary_tokens = summary_tokens
+
+    def checkpoint_settings(self):
+        """Settings that change which chunks and labels a run produces, recorded in checkpoint manifests"""
+        return {
+            "prefilter": self.prefilter.settings() if self.prefilter is not None else None,
+            "structure": self.structure.settings() if self.structure is not None else None,
+        }
 
-        analyze_request = {
-            "base64Source": file_content_base64
+    def process_document(self, pdf_path, example_document, checkpoint=None):
+        """Extract text from a PDF file.
+
+        With a checkpoint.RunCheckpoint, finished chunks, labels and sections are
+        recorded as they complete and reused instead of being redone.
+        """
+        try:
+            return self._process_document(pdf_path, example_document, checkpoint)
+        finally:
+            # Don't keep prefetched ranges of a document that failed part-way
+            self.discard_prefetched(pdf_path)
+
+    def _process_document(self, pdf_path, example_document, checkpoint):
+        # Classify each page range on a background thread while later ranges are still being analyzed
+        pending = []
+        prefilter_run = self.prefilter.new_run() if self.prefilter is not None else None
+        with ThreadPoolExecutor(max_workers=1) as classifier:
+            for chunks in self.iter_chunks(pdf_path, checkpoint, prefilter_run):
+                # Texts stay encoded in the store and are decoded only as requests are built
+                labels = classifier.submit(self.classify_chunks, chunks.text_view(), checkpoint, chunks.roles())
+                pending.append((chunks, labels))
+
+        # Sections refer to their chunks as (store, index) until they are generated
+        section_chunks = {}
+        for chunks, labels in pending:
+            for index, section in enumerate(labels.result()):
+                if section not in section_chunks:
+                    section_chunks[section] = []
+                section_chunks[section].append((chunks, index))
+
+        def generate(name):
+            if checkpoint is not None and checkpoint.section(name) is not None:
+                return checkpoint.section(name)
+            texts = [chunks.text(index) for chunks, index in section_chunks[name]]
+            content = self._generate_section(texts, example_document.sections.get(name))
+            if checkpoint is not None:
+                checkpoint.record_section(name, content)
+            return content
+
+        # Sections are independent, so generate them all at once
+        section_names = list(section_chunks)
+        with span("generate"):
+            generated = parallel_map(generate, section_names, self.max_concurrency)
+        stats = {}
+        if prefilter_run is not None:
+            stats = {f"prefilter_{outcome}": count for outcome, count in prefilter_run.counts.items()}
+            stats["chunks_avoided"] = prefilter_run.avoided
+        return Document(dict(zip(section_names, generated)), stats)
+
+    def iter_chunks(self, pdf_path, checkpoint=None, prefilter_run=None):
+        """Yield the chunks of a PDF one analyzed page range at a time, skipping checkpointed ranges"""
+        ranges = self._ranges(pdf_path)
+        done = {} if checkpoint is None else {
+            pages: checkpoint.chunks(pages) for pages in ranges if checkpoint.chunks(pages) is not None
         }
-        poller = self.doc_client.begin_analyze_document(
-            "prebuilt-layout", 
-            analyze_request=analyze_request
+        results = self.iter_layout(pdf_path, [pages for pages in ranges if pages not in done])
+        for pages in ranges:
+            if pages in done:
+                if prefilter_run is not None and checkpoint.prefilter(pages) is not None:
+                    # The earlier run filtered this range; take over its counts and duplicate index
+                    prefilter_run.restore(checkpoint.prefilter(pages))
+                yield done[pages]
+                continue
+            mark = prefilter_run.mark() if prefilter_run is not None else None
+            chunks = self.extract_chunks(next(results), prefilter_run)
+            if checkpoint is not None:
+                checkpoint.record_chunks(pages, chunks, prefilter_run.changes(mark) if mark is not None else None)
+            yield chunks
+
+    def extract_chunks(self, result, prefilter_run=None):
+        """Turn a layout result into a ChunkStore of paragraph and table chunks"""
+        # Index the spans of all tables
+        table_index = SpanIndex.from_document_spans(
+            span for table in result.tables or [] if len(table.cells) > 0 for span in table.spans
         )
-        result = poller.result()
-
-        # Get spans of all tables
-        table_spans = []
-        for table in result.tables:
-            if len(table.cells) > 0:
-                table_spans.append((table.spans[0].offset, table.spans[0].offset + table.spans[0].length))
 
         # Filter paragraphs to exclude table content
-        content = []
-        for paragraph in result.paragraphs:
-            # Check if paragraph overlaps with any table
-            para_start = paragraph.spans[0].offset
-            para_end = para_start + paragraph.spans[0].length
-            
-            is_in_table = any(
-                (table_start <= para_start < table_end) or 
-                (table_start < para_end <= table_end)
-                for table_start, table_end in table_spans
+        paragraphs = [
+            paragraph for paragraph in result.paragraphs or []
+            if not any(
+                table_index.overlaps(span.offset, span.offset + span.length)
+                for span in paragraph.spans
             )
-            
-            if not is_in_table:
-                content.append({
-                    'text': paragraph.content,
-                    'role': paragraph.role
-                })
+        ]
+
+        chunks = ChunkStore()
+        if prefilter_run is None:
+            for paragraph in paragraphs:
+                chunks.append(paragraph.content, paragraph.role)
+        else:
+            confidence = lambda spans: None
+            if prefilter_run.prefilter.min_confidence is not None:
+                confidence = word_confidence(result)
+            kept = prefilter_run.filter(
+                (paragraph.content, paragraph.role, confidence(paragraph.spans)) for paragraph in paragraphs
+            )
+            for text, role in kept:
+                chunks.append(text, role)
 
-        for table in result.tables:
+        for table in result.tables or []:
             if len(table.cells) > 0:
-                table_data = []
-                headers = [cell.content.strip() for cell in table.cells[0]]
-                
-                for row_cells in table.cells[1:]:
-                    row_data = {}
-                    for header, cell in zip(headers, row_cells):
-                        row_data[header] = cell.content.strip()
-                    table_data.append(row_data)
-                
-                content.append({
-                    'text': str(table_data),
-                    'role': 'table'
-                })
-
-        section_chunks = {}
-        for chunk in content:
-            section = self._ask_gpt_which_section(chunk['text'])
-            if section not in section_chunks:
-                section_chunks[section] = []
-            section_chunks[section].append(chunk['text'])
-
-        sections = {}
-        for section_name, section_content in section_chunks.items():
-            example_content = example_document.sections.get(section_name)
-            sections[section_name] = self._generate_section(section_content, example_content)
+                chunks.append(TableGrid.from_table(table).to_markdown(), "table")
+
+        return chunks
+
+    def prefetch_layout(self, pdf_path, checkpoint=None):
+        """Start the layout analyses of a PDF's first range_prefetch unfinished page ranges now.
+
+        process_document picks them up instead of starting its own, so a batch
+        can keep documents in the layout model while earlier ones are being
+        classified, with no more ranges per document in flight than usual.
+        """
+        ranges = [
+            pages for pages in self._ranges(pdf_path)
+            if checkpoint is None or checkpoint.chunks(pages) is None
+        ]
+        for pages in ranges[:max(1, self.range_prefetch)]:
+            wait = self._begin_layout(pdf_path, pages)
+            with self._prefetch_lock:
+                self._prefetched[(os.path.abspath(pdf_path), pages)] = wait
+
+    def discard_prefetched(self, pdf_path):
+        """Forget prefetched ranges of a PDF that process_document did not pick up"""
+        path = os.path.abspath(pdf_path)
+        with self._prefetch_lock:
+            for key in [key for key in self._prefetched if key[0] == path]:
+                del self._prefetched[key]
+
+    def analyze_layout(self, pdf_path, pages=None):
+        """Run the layout model over a PDF, reusing a cached result when the file is unchanged"""
+        return self._begin_layout(pdf_path, pages)()
+
+    def iter_layout(self, pdf_path, ranges=None):
+        """Yield layout results for consecutive page ranges, in order, as each range finishes"""
+        if ranges is None:
+            ranges = self._ranges(pdf_path)
+        inflight = deque()
+        for pages in ranges:
+            with self._prefetch_lock:
+                wait = self._prefetched.pop((os.path.abspath(pdf_path), pages), None)
+            inflight.append(wait or self._begin_layout(pdf_path, pages))
+            if len(inflight) >= self.range_prefetch:
+                yield inflight.popleft()()
+        while inflight:
+            yield inflight.popleft()()
+
+    def _ranges(self, pdf_path):
+        """Page ranges a PDF is analyzed in ([None] for the whole document at once)"""
+        if not self.pages_per_range:
+            return [None]
+        return list(_page_ranges(pdf_page_count(pdf_path), self.pages_per_range))
+
+    def _begin_layout(self, pdf_path, pages=None):
+        """Start a layout analysis and return a callable that waits for its result"""
+        key = None
+        if self.layout_cache is not None:
+            key = self.layout_cache.key(
+                pdf_path, self.layout_model, _api_version(self.doc_client), pages=pages
+            )
+            result = self.layout_cache.get(key)
+            if result is not None:
+                return lambda: result
+
+        if isinstance(self.doc_client, AsyncLayoutClient):
+            # The async client opens and streams the file once an analysis slot is free
+            poller = self.doc_client.begin_analyze_file(self.layout_model, pdf_path, pages=pages)
+        else:
+            # Stream the file as the request body instead of inflating it to base64 in memory
+            with open(pdf_path, "rb") as doc:
+                poller = self.doc_client.begin_analyze_document(
+                    self.layout_model,
+                    analyze_request=doc,
+                    pages=pages,
+                    content_type="application/octet-stream"
+                )
 
-        return Document(sections)
+        def wait():
+            with span("ocr"):
+                result = poller.result()
+            if key is not None:
+                self.layout_cache.put(key, result)
+            return result
+
+        return wait
+
+    def classify_chunks(self, texts, checkpoint=None, roles=None):
+        """Classify chunks, returning labels in the same order as texts.
+
+        With a structural chunker and the chunks' roles, chunks are grouped under
+        their headings and each block is classified once for all of its chunks.
+        With a router configured, only the chunks it is unsure about go to the LLM.
+        With a checkpoint, previously labelled chunks are skipped and new labels
+        are recorded as each request completes.
+        """
+        with span("classify"):
+            if checkpoint is None:
+                labels, record = [None] * len(texts), None
+            else:
+                labels, record = [checkpoint.label(text) for text in texts], checkpoint.record_labels
+
+            if self.structure is None or roles is None:
+                todo = [index for index, section in enumerate(labels) if section is None]
+                classified = self._classify_chunks(_select(texts, todo), record)
+                for index, section in zip(todo, classified):
+                    labels[index] = section
+                return labels
+
+            blocks = [
+                block for block in self.structure.blocks(texts, roles)
+                if any(labels[index] is None for index in block.indices)
+            ]
+            # Labels are checkpointed per chunk, so a block's label is recorded for each of its chunks
+            members = {}
+            for block in blocks:
+                members.setdefault(block.text, []).extend(block.indices)
+
+            def record_blocks(pairs):
+                record((texts[index], section) for block_text, section in pairs for index in members[block_text])
+
+            classified = self._classify_chunks(
+                [block.text for block in blocks], record_blocks if record is not None else None
+            )
+            for block, section in zip(blocks, classified):
+                for index in block.indices:
+                    if labels[index] is None:
+                        labels[index] = section
+            return labels
+
+    def _classify_chunks(self, texts, record=None):
+        if self.router is None:
+            return self._ask_llm_for_sections(texts, record)
+
+        labels, uncertain = self.router.route(texts)
+        fallback = self._ask_llm_for_sections(_select(texts, uncertain), record)
+        for index, section in zip(uncertain, fallback):
+            labels[index] = section
+        if record is not None:
+            routed = set(range(len(texts))) - set(uncertain)
+            record((texts[index], labels[index]) for index in sorted(routed))
+        return labels
+
+    def _ask_llm_for_sections(self, texts, record=None):
+        """Classify chunks concurrently with GPT, in batches unless batch_tokens is 0.
+
+        record, when given, is called with (text, section) pairs as each request finishes.
+        """
+        # Requests are built from indices so texts are only decoded (for a
+        # chunks.TextView) while their request is being sent
+        if not self.batch_tokens:
+            def classify(index):
+                text = texts[index]
+                section = self._ask_gpt_which_section(text)
+                if record is not None:
+                    record([(text, section)])
+                return section
+
+            return parallel_map(classify, range(len(texts)), self.max_concurrency)
+
+        def classify_batch(batch):
+            batch_labels = self._classify_batch([(index, texts[index]) for index in batch])
+            if record is not None:
+                record((texts[index], section) for index, section in batch_labels.items())
+            return batch_labels
+
+        batches = pack_batches(texts, self.batch_tokens, self.batch_size)
+        labels = [None] * len(texts)
+        for batch_labels in parallel_map(classify_batch, batches, self.max_concurrency):
+            for index, section in batch_labels.items():
+                labels[index] = section
+        return labels
+
+    def _classify_batch(self, batch):
+        """Classify a list of (index, text) pairs, splitting the batch on malformed output"""
+        try:
+            return self._ask_gpt_which_sections(batch)
+        except ValueError:
+            if len(batch) == 1:
+                index, text = batch[0]
+                return {index: self._ask_gpt_which_section(text)}
+            middle = len(batch) // 2
+            return {**self._classify_batch(batch[:middle]), **self._classify_batch(batch[middle:])}
+
+    def _ask_gpt_which_sections(self, batch):
+        """Ask GPT for the section of every chunk in the batch in a single request"""
+        chunks = "\n".join(f"[{i}] {' '.join(text.split())}" for i, (_, text) in enumerate(batch))
+        prompt = f"""Which section does each of the following numbered text chunks belong to? Options are:
+{SECTION_OPTIONS}
+
+        Chunks:
+{chunks}
+
+        Return a JSON object of the form {{"labels": [{{"index": 0, "section": "Water"}}, ...]}}
+        with exactly one entry per chunk, nothing else."""
+
+        response = self.llm.complete(
+            [{"role": "user", "content": prompt}],
+            response_format={"type": "json_object"},
+            temperature=0,
+        )
+        try:
+            entries = json.loads(response)["labels"]
+            labels = {int(entry["index"]): entry["section"].strip() for entry in entries}
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"Malformed batch classification: {response[:200]}") from e
+        if sorted(labels) != list(range(len(batch))) or not set(labels.values()) <= SECTIONS.keys():
+            raise ValueError(f"Incomplete batch classification: {response[:200]}")
+        return {batch[i][0]: section for i, section in labels.items()}
 
     def _ask_gpt_which_section(self, text):
         """Ask GPT which section the text belongs to"""
         prompt = f"""Which section does the following text belong to? Options are:
-        - Water (floods, ports)
-        - Fire (wildfires, fire stations)
-        - Administrative (employees, establishments, admin support, etc.)
-        - Other (anything else)
+{SECTION_OPTIONS}
 
         Text: {text}
 
         Return only the section name, nothing else."""
 
-        response = self.openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-        )
-        return response.choices[0].message.content.strip()
+        return self.llm.complete([{"role": "user", "content": prompt}])
 
     def _generate_section(self, section_content, example_content):
+        """Generate a section, map-reducing the source chunks first when they don't fit in one prompt"""
+        chunks = [piece for text in section_content for piece in split_text(text, self.section_tokens)]
+        total = sum(count_tokens(chunk) for chunk in chunks)
+        while total > self.section_tokens:
+            batches = [
+                [chunks[index] for index in batch]
+                for batch in pack_batches(chunks, self.section_tokens)
+            ]
+            chunks = parallel_map(self._summarize_chunks, batches, self.max_concurrency)
+            reduced = sum(count_tokens(chunk) for chunk in chunks)
+            if reduced >= total:
+                # Summaries stopped shrinking (e.g. the model ignores max_tokens): keep
+                # what fits rather than paying for passes that make no progress
+                chunks = _truncate(chunks, self.section_tokens)
+                break
+            total = reduced
+
         prompt = f"""Generate a section using these text chunks as source material.
         Here's an example of what the section should look like:
         {example_content}
 
         Source chunks:
-        {' '.join(section_content)}"""
+        {' '.join(chunks)}"""
+
+        return self.llm.complete([{"role": "user", "content": prompt}])
+
+    def _summarize_chunks(self, chunks):
+        """Map step: condense one context-sized batch of source chunks"""
+        prompt = f"""Summarize the following source text chunks. Keep every program name,
+        dollar amount, date and requirement; drop boilerplate and repetition.
 
-        response = self.openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
+        Source chunks:
+        {' '.join(chunks)}"""
+
+        return self.llm.complete(
+            [{"role": "user", "content": prompt}],
+            max_tokens=self.summary_tokens,
         )
-        return response.choices[0].message.content.strip()
 
 
 
+def parallel_map(fn, items, max_workers):
+    """Ordered map over items using up to max_workers threads"""
+    if max_workers <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(fn, items))
+
+
+def _truncate(texts, token_budget):
+    """Leading texts that fit in token_budget, the last one cut short if needed"""
+    kept = []
+    for text in texts:
+        tokens = count_tokens(text)
+        if tokens > token_budget:
+            if token_budget > 0:
+                kept.append(split_text(text, token_budget)[0])
+            break
+        kept.append(text)
+        token_budget -= tokens
+    return kept
+
+
+def _select(texts, indices):
+    """texts[index] for each index, staying lazy when texts is a chunks.TextView"""
+    if isinstance(texts, TextView):
+        return texts.select(indices)
+    return [texts[index] for index in indices]
+
+
+def pdf_page_count(pdf_path):
+    from pypdf import PdfReader
+
+    return len(PdfReader(pdf_path).pages)
+
+
+def _page_ranges(page_count, pages_per_range):
+    """1-based "first-last" page range strings covering the whole document"""
+    for first in range(1, page_count + 1, pages_per_range):
+        yield f"{first}-{min(first + pages_per_range - 1, page_count)}"
+
+
+def _api_version(doc_client):
+    """API version the Document Intelligence client talks to (part of the layout cache key)"""
+    if isinstance(doc_client, AsyncLayoutClient):
+        return doc_client.api_version
+    config = getattr(doc_client, "_config", None)
+    return getattr(config, "api_version", None)
+
+
 class DocumentEvaluator:
-    def __init__(self, openai_client: AzureOpenAI):
-        self.openai_client = openai_client
+    def __init__(self, openai_client: AzureOpenAI, max_concurrency=8):
+        self.llm = ChatClient.wrap(openai_client)
+        self.max_concurrency = max_concurrency
 
     def compare_documents(self, generated_document, example_document):
-        scores = {}
-        for section_name in example_document.sections:
-            if section_name in generated_document.sections:
-                scores[section_name] = self._compare_sections(
-                    generated_document.sections[section_name],
-                    example_document.sections[section_name]
-                )
-            else:
-                scores[section_name] = 0
+        def score(section_name):
+            if section_name not in generated_document.sections:
+                return 0
+            return self._compare_sections(
+                generated_document.sections[section_name],
+                example_document.sections[section_name]
+            )
+
+        section_names = list(example_document.sections)
+        with span("evaluate"):
+            scores = dict(zip(section_names, parallel_map(score, section_names, self.max_concurrency)))
 
         return {
             'section_scores': scores,
@@ -159,56 +531,98 @@ class DocumentEvaluator:
 
         Return only the score, nothing else."""
 
-        response = self.openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-        )
-        return float(response.choices[0].message.content.strip())
+        return float(self.llm.complete([{"role": "user", "content": prompt}]))
             
 
 
-def main():
-    doc_client = DocumentIntelligenceClient(
-        endpoint=os.getenv("AZURE_ENDPOINT"),
-        credential=AzureKeyCredential(os.getenv("AZURE_API_KEY"))
-    )
+# Example document
+EXAMPLE_DOCUMENT = Document({
+    "Water": """The region faces significant water-related challenges. Recent flooding 
+    has affected coastal areas, particularly around Port Harbor where infrastructure 
+    damage was reported at three major terminals. Flood control measures implemented 
+    last year have shown mixed results. The port authority has initiated a $2M project 
+    to upgrade flood barriers.""",
+
+    "Fire": """Fire services have been enhanced with two new stations in the western 
+    district. The wildfire response team conducted 12 major operations this period, 
+    successfully containing fires before they reached residential areas. Station 
+    equipment upgrades are ongoing, with 5 new trucks deployed.""",
+
+    "Administrative": """Current staff levels include 342 full-time employees across 
+    15 facilities. Administrative support services have been consolidated into 3 main 
+    centers. Employee training programs reached 89% completion rate. New establishment 
+    records show 27 auxiliary offices operating under revised protocols.""",
+
+    "Other": """Miscellaneous developments include the implementation of new software 
+    systems and updated security protocols. Various community engagement initiatives 
+    were launched. External contractor relationships have been reviewed and updated 
+    per standard procedures."""
+})
+
+
+def build_pipeline(example_document=EXAMPLE_DOCUMENT):
+    """DocumentProcessor, DocumentEvaluator and ChatClient configured from the environment"""
+    # Analyses run on the aio client, so many documents can be in the layout model at once
+    doc_client = AsyncLayoutClient.from_env()
 
     openai_client = AzureOpenAI(
         api_version="2024-08-01-preview",
         azure_endpoint=os.getenv("OPENAI_ENDPOINT"),
-        api_key=os.getenv("AZURE_OPENAI_API_KEY")
+        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+        # ChatClient retries 429s itself so the rate limiter sees every one
+        max_retries=0,
+    )
+
+    concurrency = int(os.getenv("PIPELINE_CONCURRENCY", "8"))
+    llm = ChatClient(
+        openai_client,
+        cache=SQLiteCache(os.getenv("COMPLETION_CACHE", ".completion_cache.sqlite")),
+        limiter=default_limiter(),
     )
+    layout_cache = LayoutCache(os.getenv("LAYOUT_CACHE_DIR", ".layout_cache"))
+    router = None
+    if os.getenv("EMBEDDING_DEPLOYMENT"):
+        from router import EmbeddingRouter, OpenAIEmbedder
+
+        # Embedding calls share the completion client's backoff and rate limiter
+        router = EmbeddingRouter(OpenAIEmbedder(llm, model=os.getenv("EMBEDDING_DEPLOYMENT")), example_document)
+
+    pipeline = DocumentProcessor(
+        doc_client,
+        llm,
+        router=router,
+        max_concurrency=concurrency,
+        layout_cache=layout_cache,
+        pages_per_range=int(os.getenv("PAGES_PER_RANGE", "0")) or None,
+        prefilter=PreFilter() if os.getenv("PREFILTER", "1") != "0" else None,
+        structure=StructuralChunker() if os.getenv("STRUCTURE", "1") != "0" else None,
+    )
+    evaluator = DocumentEvaluator(llm, max_concurrency=concurrency)
+    return pipeline, evaluator, llm
+
 
-    # Example document 
-    example_document = Document({
-        "Water": """The region faces significant water-related challenges. Recent flooding 
-        has affected coastal areas, particularly around Port Harbor where infrastructure 
-        damage was reported at three major terminals. Flood control measures implemented 
-        last year have shown mixed results. The port authority has initiated a $2M project 
-        to upgrade flood barriers.""",
-        
-        "Fire": """Fire services have been enhanced with two new stations in the western 
-        district. The wildfire response team conducted 12 major operations this period, 
-        successfully containing fires before they reached residential areas. Station 
-        equipment upgrades are ongoing, with 5 new trucks deployed.""",
-        
-        "Administrative": """Current staff levels include 342 full-time employees across 
-        15 facilities. Administrative support services have been consolidated into 3 main 
-        centers. Employee training programs reached 89% completion rate. New establishment 
-        records show 27 auxiliary offices operating under revised protocols.""",
-        
-        "Other": """Miscellaneous developments include the implementation of new software 
-        systems and updated security protocols. Various community engagement initiatives 
-        were launched. External contractor relationships have been reviewed and updated 
-        per standard procedures."""
-    })
-
-    pipeline = DocumentProcessor(doc_client, openai_client)
-    evaluator = DocumentEvaluator(openai_client)
-
-    generated_document = pipeline.process_document("documents/AdminProvisions.pdf", example_document)
+def main():
+    example_document = EXAMPLE_DOCUMENT
+    pipeline, evaluator, llm = build_pipeline(example_document)
+
+    pdf_path = "documents/AdminProvisions.pdf"
+    checkpoint = None
+    if os.getenv("RUN_DIR"):
+        # Re-running with the same RUN_DIR resumes an interrupted run
+        checkpoint = RunCheckpoint(os.getenv("RUN_DIR"), pdf_path, pipeline.pages_per_range,
+                                   pipeline.checkpoint_settings())
+    generated_document = pipeline.process_document(pdf_path, example_document, checkpoint)
+    pipeline.doc_client.close()
     evaluation = evaluator.compare_documents(generated_document, example_document)
     print(f"Overall score: {evaluation['overall_score']}")
+    print(f"Completion cache: {llm.cache.stats()}")
+    if "chunks_avoided" in generated_document.stats:
+        print(f"Pre-filter: {generated_document.stats['chunks_avoided']} chunks skipped before classification")
+
+    # Prometheus textfile-collector style export of stage timings, tokens and cache hits
+    if os.getenv("METRICS_PATH"):
+        with open(os.getenv("METRICS_PATH"), "w") as f:
+            f.write(REGISTRY.render())
     print("\nSection scores:")
     for section_name, score in evaluation['section_scores'].items():
         print(f"{section_name}: {score}")
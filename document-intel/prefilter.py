@@ -0,0 +1,211 @@
+import base64
+import re
+import zlib
+import numpy as np
+from metrics import REGISTRY
+from spans import WordIndex
+from structure import is_heading
+
+PREFILTER_CHUNKS = REGISTRY.counter("prefilter_chunks_total", "Paragraphs seen by the pre-filter, by outcome")
+
+BOILERPLATE_ROLES = frozenset({"pageHeader", "pageFooter", "pageNumber"})
+
+_PRIME = (1 << 31) - 1
+_WORD = re.compile(r"\w+")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+class PreFilter:
+    """Rules for dropping or merging low-value paragraphs before classification.
+
+    - roles in drop_roles (page headers, footers and numbers) are dropped;
+    - paragraphs without any letters (bare numbers, rules, dots) are dropped;
+    - paragraphs whose mean word confidence is below min_confidence are dropped;
+    - paragraphs shorter than min_chars are merged into a neighbouring kept paragraph,
+      except short headings ("SEC. 301."), which start the next paragraph instead;
+    - near-duplicates of an earlier paragraph in the same document (MinHash
+      estimate of word-shingle Jaccard similarity >= duplicate_threshold,
+      found through LSH buckets) are dropped, unless the two differ in any
+      number: "$5,000,000 for flood control" and "$7,500,000 for flood
+      control" are different appropriations. The numbers are part of the
+      bucket keys, so such paragraphs never become each other's candidates.
+
+    Each check is constant work per paragraph (apart from hashing its own
+    shingles), so filtering a document is linear in its size. The rules are
+    stateless; per-document state lives in the PreFilterRun from new_run().
+    """
+
+    def __init__(self, drop_roles=BOILERPLATE_ROLES, min_chars=40, min_confidence=0.8,
+                 duplicate_threshold=0.9, shingle_words=5, num_perm=64, bands=16, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.drop_roles = frozenset(drop_roles)
+        self.min_chars = min_chars
+        self.min_confidence = min_confidence
+        self.duplicate_threshold = duplicate_threshold
+        self.shingle_words = shingle_words
+        self.num_perm = num_perm
+        self.bands = bands
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+    def new_run(self):
+        return PreFilterRun(self)
+
+    def settings(self):
+        """The rules as a JSON-serializable dict, for run manifests"""
+        return {"drop_roles": sorted(self.drop_roles), "min_chars": self.min_chars,
+                "min_confidence": self.min_confidence, "duplicate_threshold": self.duplicate_threshold,
+                "shingle_words": self.shingle_words, "num_perm": self.num_perm, "bands": self.bands,
+                "seed": self.seed}
+
+    def signature(self, text):
+        """MinHash signature of the text's word shingles"""
+        words = _WORD.findall(text.lower())
+        size = self.shingle_words
+        shingles = {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) % _PRIME for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        # One universal hash (a * h + b) mod p per permutation; a, h < 2^31 so nothing overflows
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1)
+
+
+def word_confidence(result):
+    """Function mapping a paragraph's spans to the mean confidence of its words (None if it has none)"""
+    index = WordIndex(word for page in result.pages or [] for word in page.get("words", []))
+    confidences = [word["confidence"] for word in index.words]
+
+    def confidence(spans):
+        found = index.indices_within(spans)
+        if not found:
+            return None
+        return sum(confidences[i] for i in found) / len(found)
+
+    return confidence
+
+
+class PreFilterRun:
+    """Per-document pre-filter state: the near-duplicate index and outcome counts.
+
+    changes(mark()) captures what filtering a part of the document (one page
+    range) added, and restore() replays it, so a run resumed from a checkpoint
+    counts and de-duplicates as if it had filtered the reused ranges itself.
+    """
+
+    def __init__(self, prefilter):
+        self.prefilter = prefilter
+        self.counts = {}
+        self._buckets = {}
+        self._signatures = []
+        self._numbers = []
+
+    def filter(self, paragraphs):
+        """Yield (text, role) for the paragraphs worth classifying.
+
+        paragraphs is an iterable of (text, role, confidence); confidence may be
+        None when it isn't known. Short paragraphs are appended to the preceding
+        kept paragraph, or prepended to the next one at the start and after a
+        short heading, which passes its role on to the paragraph it leads.
+        """
+        rules = self.prefilter
+        kept, leading, leading_role, headed = None, [], None, False
+        for text, role, confidence in paragraphs:
+            text = text.strip()
+            if role in rules.drop_roles:
+                self._count("role")
+            elif not any(char.isalpha() for char in text):
+                self._count("no_letters")
+            elif rules.min_confidence is not None and confidence is not None and confidence < rules.min_confidence:
+                self._count("low_confidence")
+            elif len(text) < rules.min_chars:
+                if is_heading(text, role):
+                    if kept:
+                        yield "\n".join(kept[0]), kept[1]
+                        kept = None
+                    elif leading and not headed:
+                        yield self._fragments(leading, None)
+                        leading = []
+                    if not leading:
+                        leading_role, headed = role, True
+                    leading.append(text)
+                elif kept:
+                    self._count("merged")
+                    kept[0].append(text)
+                else:
+                    leading.append(text)
+            elif self._is_duplicate(text):
+                self._count("duplicate")
+            else:
+                self._count("kept")
+                if kept:
+                    yield "\n".join(kept[0]), kept[1]
+                if leading:
+                    self._count("merged", len(leading))
+                kept, leading = ([*leading, text], leading_role if headed else role), []
+                leading_role, headed = None, False
+        if kept:
+            yield "\n".join(kept[0]), kept[1]
+        elif leading:
+            yield self._fragments(leading, leading_role)
+
+    def _fragments(self, leading, role):
+        """Keep short paragraphs that had nothing long enough to merge into as one chunk"""
+        self._count("kept")
+        if len(leading) > 1:
+            self._count("merged", len(leading) - 1)
+        return "\n".join(leading), role
+
+    @property
+    def avoided(self):
+        """Chunks that would otherwise each have been sent for classification"""
+        return sum(count for outcome, count in self.counts.items() if outcome != "kept")
+
+    def mark(self):
+        return dict(self.counts), len(self._signatures)
+
+    def changes(self, mark):
+        """Outcome counts and near-duplicate index entries added since mark(), JSON-serializable"""
+        counts, indexed = mark
+        return {
+            "counts": {outcome: count - counts.get(outcome, 0) for outcome, count in self.counts.items()
+                       if count != counts.get(outcome, 0)},
+            # Signature values are below 2^31, so they fit in 4 bytes each
+            "index": [[base64.b64encode(signature.astype(np.uint32).tobytes()).decode("ascii"), list(numbers)]
+                      for signature, numbers in zip(self._signatures[indexed:], self._numbers[indexed:])],
+        }
+
+    def restore(self, changes):
+        """Apply changes() recorded by an earlier run, without counting them in the metrics again"""
+        for outcome, count in changes["counts"].items():
+            self.counts[outcome] = self.counts.get(outcome, 0) + count
+        for signature, numbers in changes["index"]:
+            self._index(np.frombuffer(base64.b64decode(signature), dtype=np.uint32).astype(np.uint64), tuple(numbers))
+
+    def _count(self, outcome, amount=1):
+        self.counts[outcome] = self.counts.get(outcome, 0) + amount
+        PREFILTER_CHUNKS.inc(amount, outcome=outcome)
+
+    def _is_duplicate(self, text):
+        rules = self.prefilter
+        signature = rules.signature(text)
+        numbers = tuple(_NUMBER.findall(text))
+        candidates = {index for key in self._keys(signature, numbers) for index in self._buckets.get(key, ())}
+        for index in candidates:
+            if np.mean(self._signatures[index] == signature) >= rules.duplicate_threshold:
+                return True
+        self._index(signature, numbers)
+        return False
+
+    def _keys(self, signature, numbers):
+        # Only paragraphs with the same numbers can be duplicates, so they key the buckets too
+        bands = signature.reshape(self.prefilter.bands, -1)
+        return [(band, rows.tobytes(), numbers) for band, rows in enumerate(bands)]
+
+    def _index(self, signature, numbers):
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        self._numbers.append(numbers)
+        for key in self._keys(signature, numbers):
+            self._buckets.setdefault(key, []).append(index)
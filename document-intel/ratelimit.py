@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+
+class TokenBucket:
+    """Bucket refilling at `capacity` units per `period` seconds, holding at most `burst`.
+
+    Azure evaluates quotas over short windows rather than the whole minute, so
+    the default burst is a sixth of the quota instead of all of it, and the
+    bucket starts empty so a cold start doesn't spend the burst on top of the
+    first window's quota.
+
+    reserve() always succeeds and returns how long the caller must wait; the
+    balance may go negative, so later callers queue up behind earlier ones.
+    """
+
+    def __init__(self, capacity, period=60.0, burst=None):
+        self.rate = capacity / period
+        self.burst = burst or max(1, capacity / 6)
+        self.level = 0.0
+        self.updated = time.monotonic()
+
+    def reserve(self, amount, now):
+        self.level = min(self.burst, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        self.level -= amount
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def refund(self, amount):
+        self.level = min(self.burst, self.level + amount)
+
+
+class RateLimiter:
+    """Shared requests-per-minute / tokens-per-minute limiter with AIMD concurrency.
+
+    Every call site holding the same limiter draws from the same buckets. The
+    concurrency window grows by roughly one slot per window's worth of successful
+    requests and halves on a 429, and a retry-after pauses all callers.
+    """
+
+    def __init__(self, rpm=None, tpm=None, max_concurrency=16, min_concurrency=1, period=60.0):
+        self.requests = TokenBucket(rpm, period) if rpm else None
+        self.tokens = TokenBucket(tpm, period) if tpm else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = float(max_concurrency)
+        self.in_flight = 0
+        self.rate_limited = 0
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_env(cls):
+        """Limiter configured from OPENAI_RPM, OPENAI_TPM and OPENAI_MAX_IN_FLIGHT"""
+        return cls(
+            rpm=int(os.getenv("OPENAI_RPM", "0")) or None,
+            tpm=int(os.getenv("OPENAI_TPM", "0")) or None,
+            max_concurrency=int(os.getenv("OPENAI_MAX_IN_FLIGHT", "16")),
+        )
+
+    @contextmanager
+    def acquire(self, estimated_tokens=0):
+        """Hold a concurrency slot plus RPM/TPM budget for one request"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    self._cond.wait(self._paused_until - now)
+                elif self.in_flight >= int(self.concurrency):
+                    self._cond.wait()
+                else:
+                    break
+            self.in_flight += 1
+            delay = 0.0
+            if self.requests is not None:
+                delay = max(delay, self.requests.reserve(1, now))
+            if self.tokens is not None:
+                delay = max(delay, self.tokens.reserve(estimated_tokens, now))
+        try:
+            if delay:
+                time.sleep(delay)
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    def on_success(self, estimated_tokens=0, used_tokens=None):
+        with self._cond:
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+            if self.tokens is not None and used_tokens is not None and used_tokens < estimated_tokens:
+                self.tokens.refund(estimated_tokens - used_tokens)
+            self._cond.notify_all()
+
+    def on_rate_limited(self, retry_after):
+        with self._cond:
+            now = time.monotonic()
+            self.rate_limited += 1
+            # 429s arriving together are one congestion event; halve once per pause
+            if now >= self._paused_until:
+                self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+            self._paused_until = max(self._paused_until, now + retry_after)
+
+
+@lru_cache(maxsize=None)
+def default_limiter():
+    """Process-wide limiter from the environment, shared by every script and stage"""
+    return RateLimiter.from_env()
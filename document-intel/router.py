@@ -0,0 +1,73 @@
+import re
+import zlib
+import numpy as np
+from llm import ChatClient
+
+
+class HashingEmbedder:
+    """Deterministic local embedder (signed hashed bag of words) for tests and offline runs"""
+
+    def __init__(self, dimensions=1024):
+        self.dimensions = dimensions
+
+    def __call__(self, texts):
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"[a-z0-9]+", text.lower()):
+                h = zlib.crc32(word.encode("utf-8"))
+                vectors[row, h % self.dimensions] += 1.0 if h & 0x80000000 else -1.0
+        return vectors
+
+
+class OpenAIEmbedder:
+    """Embeds texts with an (Azure)OpenAI embeddings deployment, batch_size inputs per request.
+
+    Requests go through llm.ChatClient, so they share its 429 backoff and rate limiter.
+    """
+
+    def __init__(self, openai_client, model="text-embedding-3-small", batch_size=256):
+        self.llm = ChatClient.wrap(openai_client)
+        self.model = model
+        self.batch_size = batch_size
+
+    def __call__(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self.llm.embed(list(texts[start:start + self.batch_size]), model=self.model))
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class EmbeddingRouter:
+    """Assigns chunks to the nearest section centroid built from the example document.
+
+    Chunks whose best and second-best cosine similarities are closer than
+    min_margin are reported as uncertain so the caller can fall back to the LLM.
+    """
+
+    def __init__(self, embed, example_document, min_margin=0.05):
+        self.embed = embed
+        self.min_margin = min_margin
+        self.sections = [name for name, text in example_document.sections.items() if text]
+        centroids = []
+        for name in self.sections:
+            sentences = [s for s in re.split(r"(?<=[.!?])\s+", example_document.sections[name]) if s.strip()]
+            centroids.append(_normalize(self.embed(sentences)).mean(axis=0))
+        self.centroids = _normalize(np.vstack(centroids))
+
+    def route(self, texts):
+        """Return (labels, uncertain) where uncertain lists indices of low-margin chunks"""
+        if not texts:
+            return [], []
+        similarities = _normalize(self.embed(texts)) @ self.centroids.T
+        if len(self.sections) == 1:
+            return [self.sections[0]] * len(texts), []
+        top_two = np.sort(similarities, axis=1)[:, -2:]
+        margins = top_two[:, 1] - top_two[:, 0]
+        labels = [self.sections[i] for i in similarities.argmax(axis=1)]
+        uncertain = np.flatnonzero(margins < self.min_margin).tolist()
+        return labels, uncertain
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
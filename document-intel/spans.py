@@ -0,0 +1,69 @@
+from bisect import bisect_left, bisect_right
+
+
+class SpanIndex:
+    """Merged, sorted set of half-open [start, end) spans answering overlap queries in O(log n)"""
+
+    def __init__(self, spans):
+        starts, ends = [], []
+        for start, end in sorted(spans):
+            if starts and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def from_document_spans(cls, spans):
+        """Build from Document Intelligence span objects (offset/length)"""
+        return cls((span.offset, span.offset + span.length) for span in spans)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlaps(self, start, end):
+        """True if [start, end) overlaps, touches the inside of, or contains any indexed span"""
+        i = bisect_right(self.starts, start) - 1
+        if i >= 0 and self.ends[i] > start:
+            return True
+        return i + 1 < len(self.starts) and self.starts[i + 1] < end
+
+
+class WordIndex:
+    """A page's words sorted by offset, so the words inside a span are a bisect range lookup.
+
+    Words and spans are read through the mapping interface (word["span"]["offset"]),
+    which is far cheaper than Document Intelligence model attributes and also
+    accepts the raw JSON dicts.
+    """
+
+    def __init__(self, words):
+        self.words = list(words)
+        spans = [(word["span"]["offset"], word["span"]["length"]) for word in self.words]
+        self.order = sorted(range(len(spans)), key=lambda i: spans[i][0])
+        self.starts = [spans[i][0] for i in self.order]
+        self.ends = [spans[i][0] + spans[i][1] for i in self.order]
+
+    def indices_within(self, spans):
+        """Indices (in page order) of the words lying entirely inside any of the spans"""
+        found = []
+        for span in spans:
+            start = span["offset"]
+            end = start + span["length"]
+            first = bisect_left(self.starts, start)
+            last = bisect_left(self.starts, end, first)
+            found.extend(self.order[i] for i in range(first, last) if self.ends[i] <= end)
+        return sorted(set(found))
+
+    def within(self, spans):
+        return [self.words[i] for i in self.indices_within(spans)]
+
+    def line_of_words(self, lines):
+        """Index into lines for every word (None for words outside all lines)"""
+        line_of = [None] * len(self.words)
+        for line_index, line in enumerate(lines):
+            for i in self.indices_within(line["spans"]):
+                line_of[i] = line_index
+        return line_of
@@ -0,0 +1,106 @@
+import re
+from dataclasses import dataclass
+from metrics import REGISTRY
+from tokens import count_tokens, split_text
+
+STRUCTURE_CHUNKS = REGISTRY.counter(
+    "structure_chunks_total", "Chunks seen by the structural chunker, and blocks classified in their place"
+)
+
+HEADING_ROLES = {"title": 0, "sectionHeading": 1}
+
+# Bill headings: "DIVISION A", "TITLE III—GENERAL PROVISIONS" open a part of the
+# act, "SEC. 301.", "Sec. 4." and "SECTION 1." open a section within it
+_PART = re.compile(r"\s*(?:DIVISION\s+[A-Z]|TITLE\s+[IVXLC]+)\b")
+_SECTION = re.compile(r"\s*(?:SEC\.|SECTION|Sec\.|Section)\s+\d+[A-Za-z]?\.(?:\s|$)")
+
+
+def heading_level(text, role=None):
+    """0 for part headings (titles, divisions), 1 for section headings, None for body text"""
+    if _PART.match(text):
+        return 0
+    if _SECTION.match(text):
+        return 1
+    return HEADING_ROLES.get(role)
+
+
+def is_heading(text, role=None):
+    return heading_level(text, role) is not None
+
+
+@dataclass
+class Block:
+    """Consecutive chunks under one heading and the text classified on their behalf"""
+    indices: list
+    text: str
+
+
+class StructuralChunker:
+    """Group a document's chunks under their nearest heading so each group is classified once.
+
+    A block starts at every heading and runs to the next one. It is classified
+    from its enclosing part heading (e.g. "TITLE II—..."), its own heading and
+    as much of its opening text as fits in sample_tokens. Blocks holding more
+    than max_block_tokens of text (long sections, or documents without
+    headings) are split so one label never covers too much. Tables are stored
+    after the paragraphs rather than in reading order, so each table is a block
+    of its own.
+    """
+
+    def __init__(self, sample_tokens=400, max_block_tokens=8000, table_roles=frozenset({"table"})):
+        self.sample_tokens = sample_tokens
+        self.max_block_tokens = max_block_tokens
+        self.table_roles = frozenset(table_roles)
+
+    def settings(self):
+        """The chunker's parameters as a JSON-serializable dict, for run manifests"""
+        return {"sample_tokens": self.sample_tokens, "max_block_tokens": self.max_block_tokens,
+                "table_roles": sorted(self.table_roles)}
+
+    def blocks(self, texts, roles):
+        """Blocks covering every index of texts; roles are the chunks' layout roles"""
+        blocks, current, heading, part = [], [], None, None
+        for index, (text, role) in enumerate(zip(texts, roles)):
+            if role in self.table_roles:
+                blocks.extend(self._split([index], texts, None, None))
+                continue
+            level = heading_level(text, role)
+            if level is not None:
+                if current:
+                    blocks.extend(self._split(current, texts, heading, part))
+                current, heading = [], _first_line(text)
+                if level == 0:
+                    part = heading
+            current.append(index)
+        if current:
+            blocks.extend(self._split(current, texts, heading, part))
+        STRUCTURE_CHUNKS.inc(len(texts), kind="chunk")
+        STRUCTURE_CHUNKS.inc(len(blocks), kind="block")
+        return blocks
+
+    def _split(self, indices, texts, heading, part):
+        """Cut one heading's chunks into blocks of at most max_block_tokens, each led by the headings"""
+        context = [line for line in dict.fromkeys((part, heading)) if line]
+        budget = max(self.sample_tokens - sum(count_tokens(line) for line in context), 1)
+
+        blocks, members, sample, sampled, used = [], [], [], 0, 0
+        for index in indices:
+            text = texts[index]
+            if heading and index == indices[0]:
+                # The heading is already in the context; keep whatever body text followed it
+                text = text.strip()[len(heading):].strip()
+            tokens = count_tokens(text)
+            if members and used + tokens > self.max_block_tokens:
+                blocks.append(Block(members, "\n".join(context + sample)))
+                members, sample, sampled, used = [], [], 0, 0
+            members.append(index)
+            used += tokens
+            if text and sampled < budget:
+                sample.append(text if sampled + tokens <= budget else split_text(text, budget - sampled)[0])
+                sampled += tokens
+        blocks.append(Block(members, "\n".join(context + sample)))
+        return blocks
+
+
+def _first_line(text):
+    return text.strip().split("\n", 1)[0][:200]
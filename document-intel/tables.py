@@ -0,0 +1,131 @@
+import csv
+
+
+class TableGrid:
+    """Dense row-major grid of a layout table's cell contents.
+
+    Built in one pass over table.cells by placing each cell at its
+    row_index/column_index, instead of searching the cells for every position.
+    Empty positions hold None.
+    """
+
+    def __init__(self, row_count, column_count, values, header_rows=0):
+        self.row_count = row_count
+        self.column_count = column_count
+        self.values = values
+        self.header_rows = header_rows
+
+    @classmethod
+    def from_table(cls, table, fill_spans=True):
+        """Grid for a DocumentTable; fill_spans repeats a spanning cell over every position it covers.
+
+        Fields are read through the model's mapping interface (camelCase keys), which
+        is far cheaper than its attribute properties and also accepts the raw JSON dict.
+        """
+        rows, columns = table["rowCount"], table["columnCount"]
+        values = [None] * (rows * columns)
+        header_rows = 0
+        for cell in table["cells"]:
+            row_index, column_index, content = cell["rowIndex"], cell["columnIndex"], cell["content"]
+            row_span = cell.get("rowSpan") or 1
+            column_span = (cell.get("columnSpan") or 1) if fill_spans else 1
+            width = min(column_span, columns - column_index)
+            for row in range(row_index, min(row_index + (row_span if fill_spans else 1), rows)):
+                start = row * columns + column_index
+                values[start:start + width] = [content] * width
+            if cell.get("kind") == "columnHeader":
+                header_rows = max(header_rows, row_index + row_span)
+        return cls(rows, columns, values, header_rows)
+
+    def __getitem__(self, position):
+        row, column = position
+        return self.values[row * self.column_count + column]
+
+    def rows(self):
+        """Iterate rows as lists of cell contents"""
+        for start in range(0, len(self.values), self.column_count or 1):
+            yield self.values[start:start + self.column_count]
+
+    def columns(self):
+        """Column names from the header rows (joined with a space), or positional names"""
+        if not self.header_rows:
+            return [str(column) for column in range(self.column_count)]
+        columns = self.column_count
+        header = [self.values[row * columns:(row + 1) * columns] for row in range(self.header_rows)]
+        names = []
+        for column in range(self.column_count):
+            parts = []
+            for row in header:
+                if row[column] and (not parts or parts[-1] != row[column]):
+                    parts.append(row[column])
+            names.append(" ".join(parts) or str(column))
+        return names
+
+    def to_numpy(self):
+        """(row_count, column_count) NumPy object array"""
+        import numpy as np
+
+        return np.array(self.values, dtype=object).reshape(self.row_count, self.column_count)
+
+    def to_pandas(self):
+        """DataFrame of the body rows, with the header rows as column names (requires pandas)"""
+        import pandas as pd
+
+        body = self.to_numpy()[self.header_rows:]
+        return pd.DataFrame(body, columns=_unique(self.columns()), dtype=object)
+
+    def to_markdown(self):
+        """Markdown table with the first row as the header"""
+        def line(row):
+            return "| " + " | ".join(_markdown_cell(value) for value in row) + " |"
+
+        rows = self.rows()
+        first = next(rows, None)
+        if first is None:
+            return ""
+        lines = [line(first), "|" + " --- |" * self.column_count]
+        lines.extend(line(row) for row in rows)
+        return "\n".join(lines)
+
+    def write_csv(self, file):
+        """Write the header and body rows to a path or text file object, one row at a time"""
+        if isinstance(file, str):
+            with open(file, "w", newline="", encoding="utf-8") as f:
+                return self.write_csv(f)
+        writer = csv.writer(file)
+        if self.header_rows:
+            writer.writerow(self.columns())
+        for index, row in enumerate(self.rows()):
+            if index >= self.header_rows:
+                writer.writerow(["" if value is None else value for value in row])
+
+    def write_parquet(self, path, rows_per_group=10000):
+        """Write the body rows as string columns in row groups of rows_per_group (requires pyarrow)"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        names = _unique(self.columns())
+        schema = pa.schema([(name, pa.string()) for name in names])
+        columns = self.column_count
+        with pq.ParquetWriter(path, schema) as writer:
+            for first in range(self.header_rows, self.row_count, rows_per_group):
+                last = min(first + rows_per_group, self.row_count)
+                chunk = self.values[first * columns:last * columns]
+                writer.write_table(pa.table(
+                    [pa.array(chunk[column::columns], pa.string()) for column in range(columns)],
+                    schema=schema,
+                ))
+
+
+def _markdown_cell(value):
+    return "" if value is None else " ".join(value.split()).replace("|", "\\|")
+
+
+def _unique(names):
+    """Suffix repeated column names so DataFrame/Parquet columns stay distinct"""
+    seen = {}
+    unique = []
+    for name in names:
+        seen[name] = seen.get(name, 0) + 1
+        unique.append(name if seen[name] == 1 else f"{name}.{seen[name] - 1}")
+    return unique
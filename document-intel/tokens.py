@@ -0,0 +1,67 @@
+import threading
+from functools import lru_cache
+
+_encoding_lock = threading.Lock()
+
+
+def _encoding():
+    """tiktoken encoding used by the gpt-4o family, or None when tiktoken is unavailable"""
+    # Loading may download the BPE file; the lock keeps concurrent callers
+    # (rate limiter estimates from many threads) from each loading it
+    with _encoding_lock:
+        return _load_encoding()
+
+
+@lru_cache(maxsize=None)
+def _load_encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English text)"""
+    return -(-len(text) // 4)
+
+
+def count_tokens(text):
+    """Token count with tiktoken when installed, otherwise the character estimate"""
+    encoding = _encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_text(text, token_budget):
+    """Split text into pieces of at most token_budget tokens"""
+    if count_tokens(text) <= token_budget:
+        return [text]
+    encoding = _encoding()
+    if encoding is None:
+        step = token_budget * 4
+        return [text[i:i + step] for i in range(0, len(text), step)]
+    tokens = encoding.encode(text, disallowed_special=())
+    return [encoding.decode(tokens[i:i + token_budget]) for i in range(0, len(tokens), token_budget)]
+
+
+def pack_batches(texts, token_budget, max_items=None, count=count_tokens):
+    """Greedily pack texts into batches of indices that stay under token_budget.
+
+    A single text larger than the budget still gets a batch of its own.
+    """
+    batches = []
+    batch, batch_tokens = [], 0
+    for index, text in enumerate(texts):
+        tokens = count(text)
+        full = max_items is not None and len(batch) >= max_items
+        if batch and (full or batch_tokens + tokens > token_budget):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(index)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
@@ -1,15 +1,26 @@
-import azure.functions as func
-
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-#from openai import AzureOpenAI
-#import os
-#from dotenv import load_dotenv
+from .clients import close_clients, get_openai_client
+from .metrics import instrument, span
+import json
+import os
+
+
+### VARS ###
 
+MODEL = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await close_clients()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,15 +30,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-### VARS ###
-#load_dotenv()
-#
-#OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
-#AZURE_ENDPOINT = "https://my-static-app-openai.openai.azure.com/openai/deployments/gpt-4o/chat/completions?api-version=2023-03-15-preview"
-#MODEL = "gpt-4o"
-#
-#if not OPENAI_API_KEY:
-#    raise ValueError("OPENAI_API_KEY is not set")
+instrument(app)
 
 ### UTILS ###
 
@@ -35,23 +38,42 @@ async def stream_test_func():
     for i in range(100):
         yield f"Message {i}\n"
 
-#def get_client():
-#    return AzureOpenAI(
-#        api_key=OPENAI_API_KEY,
-#        api_version="2024-05-13",
-#        azure_endpoint=AZURE_ENDPOINT
-#    )
-#
-#async def chat(prompt: str, client: AzureOpenAI):
-#    async for chunk in client.chat.completions.create(
-#        model=MODEL,
-#        messages=[
-#            {"role": "user", "content": prompt}
-#        ],
-#        stream=True
-#    ):
-#        if content := chunk.choices[0].delta.content:
-#            yield content
+def get_client():
+    client = get_openai_client()
+    if client is None:
+        raise HTTPException(status_code=503, detail="OPENAI_API_KEY is not set")
+    return client
+
+def sse(data) -> str:
+    return f"data: {json.dumps(data)}\n\n"
+
+async def chat(prompt: str, client):
+    """Relay completion tokens as server-sent events.
+
+    If the client disconnects, Starlette cancels this generator and the finally
+    block closes the upstream stream, returning its connection to the pool.
+    """
+    from openai import OpenAIError
+
+    stream = None
+    try:
+        with span("chat_first_token"):
+            stream = await client.chat.completions.create(
+                model=MODEL,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                stream=True
+            )
+        async for chunk in stream:
+            if chunk.choices and (content := chunk.choices[0].delta.content):
+                yield sse({"content": content})
+        yield "data: [DONE]\n\n"
+    except OpenAIError as e:
+        yield f"event: error\n{sse({'detail': str(e)})}"
+    finally:
+        if stream is not None:
+            await stream.close()
 
 
 
@@ -66,8 +88,8 @@ class LoginCredentials(BaseModel):
     username: str
     password: str
 
-#class ChatPrompt(BaseModel):
-#    prompt: str = Field(..., min_length=1, max_length=1000)
+class ChatPrompt(BaseModel):
+    prompt: str = Field(..., min_length=1, max_length=1000)
 
 
 ### API ROUTES ###
@@ -103,6 +125,10 @@ async def authenticate(credentials: LoginCredentials):
 async def stream_test():
     return StreamingResponse(stream_test_func())
 
-#@app.post("/api/chat")
-#async def chat_route(prompt: ChatPrompt, client: AzureOpenAI = Depends(get_client)):
-#    return StreamingResponse(chat(prompt.prompt, client), media_type="text/plain")
+@app.post("/api/chat")
+async def chat_route(prompt: ChatPrompt, client=Depends(get_client)):
+    return StreamingResponse(
+        chat(prompt.prompt, client),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
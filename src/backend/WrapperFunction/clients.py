@@ -0,0 +1,46 @@
+"""Process-wide SDK clients, created on first use.
+
+The openai/httpx imports alone are a large share of a cold start, so nothing
+here is imported until a route that needs the client actually runs.
+"""
+import os
+import threading
+
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+AZURE_OPENAI_ENDPOINT = os.environ.get("AZURE_OPENAI_ENDPOINT", "https://my-static-app-openai.openai.azure.com")
+AZURE_OPENAI_API_VERSION = os.environ.get("AZURE_OPENAI_API_VERSION", "2024-08-01-preview")
+OPENAI_MAX_CONNECTIONS = int(os.environ.get("OPENAI_MAX_CONNECTIONS", "100"))
+
+_lock = threading.Lock()
+_openai = None
+
+
+def get_openai_client():
+    """Shared AsyncAzureOpenAI client (one pooled httpx client per process), or None if unconfigured"""
+    global _openai
+    if _openai is None and OPENAI_API_KEY:
+        with _lock:
+            if _openai is None:
+                import httpx
+                from openai import AsyncAzureOpenAI
+
+                _openai = AsyncAzureOpenAI(
+                    api_key=OPENAI_API_KEY,
+                    api_version=AZURE_OPENAI_API_VERSION,
+                    azure_endpoint=AZURE_OPENAI_ENDPOINT,
+                    http_client=httpx.AsyncClient(
+                        limits=httpx.Limits(
+                            max_connections=OPENAI_MAX_CONNECTIONS,
+                            max_keepalive_connections=OPENAI_MAX_CONNECTIONS // 5,
+                        ),
+                        timeout=httpx.Timeout(60.0, connect=5.0),
+                    ),
+                )
+    return _openai
+
+
+async def close_clients():
+    global _openai
+    if _openai is not None:
+        await _openai.close()
+        _openai = None
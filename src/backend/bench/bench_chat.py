@@ -0,0 +1,84 @@
+"""Time-to-first-byte and concurrent stream throughput for /api/chat against the mock upstream.
+
+Runs the FastAPI app under uvicorn in a subprocess, pointed at bench/mock_openai.py.
+From src/backend:
+
+    python bench/bench_chat.py --streams 1 10 50
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import httpx
+from mock_openai import MockOpenAI
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def one_stream(client, url):
+    start = time.perf_counter()
+    ttfb = None
+    events = 0
+    async with client.stream("POST", url, json={"prompt": "hello"}) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("data: "):
+                ttfb = ttfb or time.perf_counter() - start
+                events += 1
+    return ttfb, time.perf_counter() - start, events
+
+
+async def run(url, streams):
+    async with httpx.AsyncClient(timeout=None, limits=httpx.Limits(max_connections=streams)) as client:
+        return await asyncio.gather(*(one_stream(client, url) for _ in range(streams)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streams", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--first-token-delay", type=float, default=0.2)
+    args = parser.parse_args()
+
+    mock = MockOpenAI(first_token_delay=args.first_token_delay)
+    threading.Thread(target=mock.serve_forever, daemon=True).start()
+
+    port = free_port()
+    env = dict(os.environ, OPENAI_API_KEY="mock",
+               AZURE_OPENAI_ENDPOINT=f"http://127.0.0.1:{mock.server_address[1]}")
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "WrapperFunction:app", "--port", str(port), "--log-level", "warning"],
+        cwd=backend_dir,
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}/api/chat"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/api/hello")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        for streams in args.streams:
+            results = asyncio.run(run(url, streams))
+            ttfbs = [ttfb for ttfb, _, _ in results]
+            totals = [total for _, total, _ in results]
+            print(f"streams={streams:4d}  ttfb p50={statistics.median(ttfbs) * 1000:6.0f}ms "
+                  f"max={max(ttfbs) * 1000:6.0f}ms  total p50={statistics.median(totals):5.2f}s "
+                  f"events/stream={results[0][2]}")
+    finally:
+        server.terminate()
+        server.wait()
+        mock.shutdown()
+
+
+if __name__ == "__main__":
+    main()
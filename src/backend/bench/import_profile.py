@@ -0,0 +1,65 @@
+"""Per-module import cost of the Functions entry point, checked against a budget.
+
+Runs `python -X importtime -c "import function_app"` in a fresh interpreter,
+so nothing is cached, and reports the most expensive top-level packages.
+Exits non-zero when the total exceeds --budget-ms, for use in CI. From src/backend:
+
+    python bench/import_profile.py --budget-ms 800
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile(module, cwd):
+    """Return [(self_us, cumulative_us, depth, name)] for every import made by `import module`"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="function_app")
+    parser.add_argument("--budget-ms", type=float, default=None)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=3, help="take the fastest of N runs to reduce noise")
+    args = parser.parse_args()
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    runs = [profile(args.module, backend_dir) for _ in range(args.runs)]
+    rows = min(runs, key=lambda rows: sum(self_us for self_us, _, _, _ in rows))
+
+    by_package = defaultdict(int)
+    for self_us, _, _, name in rows:
+        by_package[name.split(".")[0]] += self_us
+    total_ms = sum(by_package.values()) / 1000
+
+    print(f"{'package':30s} {'ms':>8s} {'share':>6s}")
+    for package, us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:30s} {us / 1000:8.1f} {us / 1000 / total_ms:6.1%}")
+    print(f"{'total':30s} {total_ms:8.1f}")
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"import of {args.module} took {total_ms:.0f}ms, over the {args.budget_ms:.0f}ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
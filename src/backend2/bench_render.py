@@ -0,0 +1,37 @@
+"""Summary PDF renders per second with a process pool of 1, 4 and 8 workers.
+
+    python bench_render.py --renders 200
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from render import render_summary_pdf
+
+SECTION_TEXT = ("Funds appropriated under this heading shall remain available until expended. "
+                "The Secretary shall report to the Committees on Appropriations within 90 days. ") * 40
+
+SECTIONS = {name: "\n\n".join([SECTION_TEXT] * 3) for name in ("Water", "Fire", "Administrative", "Other")}
+
+
+def render(i):
+    return len(render_summary_pdf(f"Summary {i}", SECTIONS, {"Summary Type": "Executive"}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--renders", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(render, range(workers)))  # warm up worker processes
+            start = time.perf_counter()
+            sizes = list(pool.map(render, range(args.renders)))
+            elapsed = time.perf_counter() - start
+        print(f"workers={workers}  {args.renders / elapsed:7.1f} renders/s  "
+              f"({sum(sizes) / len(sizes) / 1024:.0f} KB per PDF)")
+
+
+if __name__ == "__main__":
+    main()
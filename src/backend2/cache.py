@@ -0,0 +1,89 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+from metrics import REGISTRY
+
+CACHE_LOOKUPS = REGISTRY.counter("cache_lookups_total", "Cache lookups by cache and result")
+
+
+def result_key(sha256: str, **options) -> str:
+    """Cache key for a document (by content hash) summarized with the given options"""
+    params = "&".join(f"{name}={options[name]}" for name in sorted(options))
+    return hashlib.sha256(f"{sha256}?{params}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedResult:
+    content: bytes
+    media_type: str
+    etag: str
+
+    @classmethod
+    def from_bytes(cls, content: bytes, media_type: str = "application/pdf"):
+        return cls(content, media_type, f'"{hashlib.sha256(content).hexdigest()}"')
+
+
+class ResultCache:
+    """TTL + LRU cache of finished results that coalesces concurrent identical computations.
+
+    While a key is being computed, other callers asking for it await the same
+    future instead of starting their own computation.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: CachedResult):
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[CachedResult]]) -> CachedResult:
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            CACHE_LOOKUPS.inc(cache="summary", result="hit")
+            return cached
+        if key in self._inflight:
+            self.coalesced += 1
+            CACHE_LOOKUPS.inc(cache="summary", result="coalesced")
+            return await asyncio.shield(self._inflight[key])
+
+        self.misses += 1
+        CACHE_LOOKUPS.inc(cache="summary", result="miss")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting on it
+            future.exception()
+            raise
+        else:
+            self.put(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
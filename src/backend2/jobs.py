@@ -0,0 +1,113 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class JobQueueFull(Exception):
+    """Raised by submit() when the queue is at max depth"""
+
+
+@dataclass
+class Job:
+    id: str
+    payload: Dict[str, Any]
+    status: str = "queued"  # queued -> processing -> complete | error
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class JobBackend:
+    """Interface for job backends; InProcessJobBackend can be swapped for a real queue later"""
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def submit(self, payload: Dict[str, Any]) -> Job:
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Job]:
+        raise NotImplementedError
+
+
+class InProcessJobBackend(JobBackend):
+    """asyncio queue with a fixed pool of worker tasks in this process.
+
+    The queue holds at most max_queue waiting jobs; submit() raises JobQueueFull
+    beyond that so the API can push back with a 429. Only the most recent
+    max_jobs jobs are kept for status lookups.
+    """
+
+    def __init__(self, handler: Callable[[Dict[str, Any]], Awaitable[Any]],
+                 workers: int = 4, max_queue: int = 32, max_jobs: int = 1000):
+        self.handler = handler
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_jobs = max_jobs
+        self._queue: Optional[asyncio.Queue] = None
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._tasks = []
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, payload):
+        job = Job(id=uuid.uuid4().hex, payload=payload)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"{self.max_queue} jobs already queued")
+        self._jobs[job.id] = job
+        self._trim()
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = "processing"
+            try:
+                job.result = await self.handler(job.payload)
+                job.status = "complete"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.status = "error"
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+                self._queue.task_done()
+
+    def _trim(self):
+        """Forget the oldest finished jobs once more than max_jobs are tracked"""
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished_at][:max(excess, 0)]:
+            del self._jobs[job_id]
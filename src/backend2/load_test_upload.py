@@ -0,0 +1,106 @@
+"""Concurrent large-upload load test for /generate_summary.
+
+Starts the app under uvicorn in a subprocess, fires --concurrency uploads of
+--size-mb each, and samples the server's RSS while they run. Memory should
+stay flat as uploads grow because the form is parsed as it arrives and the
+file written straight to disk. With --limit-mb below --size-mb every upload
+should get a 413 without the body being received.
+
+    python load_test_upload.py --concurrency 8 --size-mb 100
+    python load_test_upload.py --concurrency 8 --size-mb 100 --limit-mb 10
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def sample_rss(pid, samples, stop):
+    while not stop.is_set():
+        samples.append(rss_mb(pid))
+        await asyncio.sleep(0.05)
+
+
+async def upload(client, url, path):
+    with open(path, "rb") as f:
+        response = await client.post(
+            url,
+            files={"file": ("load.pdf", f, "application/pdf")},
+            data={"type": "Report", "summary_type": "Executive"},
+        )
+    return response.status_code
+
+
+async def run(args, port, pid, payload_path):
+    url = f"http://127.0.0.1:{port}/generate_summary"
+    samples, stop = [], asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(pid, samples, stop))
+    start = time.perf_counter()
+    async with httpx.AsyncClient(timeout=None) as client:
+        statuses = await asyncio.gather(*(upload(client, url, payload_path) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await sampler
+    return statuses, elapsed, samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--limit-mb", type=int, help="MAX_UPLOAD_BYTES in MB (default: just above --size-mb)")
+    args = parser.parse_args()
+
+    port = free_port()
+    env = dict(os.environ, SUMMARY_DELAY="0", JOB_QUEUE_DEPTH=str(args.concurrency * 2),
+               MAX_UPLOAD_BYTES=str((args.limit_mb or args.size_mb + 1) * 1024 * 1024))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+    )
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as payload:
+        block = os.urandom(1024 * 1024)
+        for _ in range(args.size_mb):
+            payload.write(block)
+        payload.flush()
+        try:
+            for _ in range(100):
+                try:
+                    httpx.get(f"http://127.0.0.1:{port}/jobs/none")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.1)
+            baseline = rss_mb(server.pid)
+            statuses, elapsed, samples = asyncio.run(run(args, port, server.pid, payload.name))
+        finally:
+            server.terminate()
+            server.wait()
+
+    total_mb = args.concurrency * args.size_mb
+    print(f"{args.concurrency} x {args.size_mb} MB uploads: statuses={sorted(set(statuses))} "
+          f"in {elapsed:.1f}s ({total_mb / elapsed:.0f} MB/s)")
+    print(f"server RSS: baseline {baseline:.0f} MB, peak {max(samples, default=baseline):.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
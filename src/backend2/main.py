@@ -1,11 +1,79 @@
-from fastapi import FastAPI, File, UploadFile, Form
-from fastapi.responses import FileResponse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from typing import List, Optional
+from cache import CachedResult, ResultCache, result_key
+from jobs import InProcessJobBackend, JobQueueFull
+from metrics import instrument, span
+from render import render_summary_pdf
+from uploads import InvalidUpload, UploadTooLarge, receive_upload
 import asyncio
 import os
 
-app = FastAPI()
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "/tmp")
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+
+
+results = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_ENTRIES", "256")),
+    ttl=float(os.getenv("RESULT_CACHE_TTL", "3600")),
+)
+
+
+async def summarize(payload):
+    """Job handler: summarize an upload, sharing the result with identical requests"""
+    # The filename is part of the key because it is rendered into the PDF's title
+    key = result_key(payload["sha256"], type=payload["type"], summary_type=payload["summary_type"],
+                     filename=payload["filename"])
+    try:
+        return await results.get_or_compute(key, lambda: render_summary(payload))
+    finally:
+        os.remove(payload["path"])
+
+
+async def render_summary(payload):
+    """Turn an uploaded document into a summary PDF"""
+    # Simulate processing time
+    with span("summarize"):
+        await asyncio.sleep(float(os.getenv("SUMMARY_DELAY", "10")))
+
+    # In a real scenario these come from the document pipeline (Document.sections)
+    sections = {"Summary": "This is an example summary."}
+
+    # PDF layout is CPU-bound, so render in the process pool rather than on the event loop
+    with span("render"):
+        content = await asyncio.get_running_loop().run_in_executor(
+            render_pool,
+            render_summary_pdf,
+            f"Summary of {payload['filename']}",
+            sections,
+            {"Document Type": payload["type"], "Summary Type": payload["summary_type"]},
+        )
+    return CachedResult.from_bytes(content)
+
+
+render_pool = None
+
+jobs = InProcessJobBackend(
+    summarize,
+    workers=int(os.getenv("JOB_WORKERS", "4")),
+    max_queue=int(os.getenv("JOB_QUEUE_DEPTH", "32")),
+)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global render_pool
+    render_pool = ProcessPoolExecutor(max_workers=int(os.getenv("RENDER_WORKERS", "2")))
+    await jobs.start()
+    yield
+    await jobs.stop()
+    render_pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = ["http://localhost:3000"]  # Adjust this to match your frontend URL
 
@@ -17,35 +85,87 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.post("/generate_summary")
-async def generate_summary(
-    file: UploadFile = File(...),
-    type: str = Form(...),
-    summary_type: str = Form(...)):
-    
-    # Save the uploaded file (in a real scenario, you'd process it)
-    file_location = f"/tmp/{file.filename}"
-    with open(file_location, "wb+") as file_object:
-        file_object.write(file.file.read())
+instrument(app)
 
-    # Simulate processing time
-    await asyncio.sleep(10)
-
-    # In a real scenario, you'd generate the PDF here based on the file and summary_type
-    # For this example, we'll just return a pre-made PDF
-    pdf_path = "example_summary.pdf"
-
-    # Check if the example PDF exists, if not create a simple one
-    if not os.path.exists(pdf_path):
-        from reportlab.pdfgen import canvas
-        c = canvas.Canvas(pdf_path)
-        c.drawString(100, 750, f"Summary of {file.filename}")
-        c.drawString(100, 730, f"Document Type: {type}")
-        c.drawString(100, 710, f"Summary Type: {summary_type}")
-        c.drawString(100, 690, "This is an example summary.")
-        c.save()
-
-    return FileResponse(pdf_path, media_type='application/pdf', filename="generated_summary.pdf")
+# The form is parsed by receive_upload rather than File()/Form() parameters, which
+# would spool the whole body to a temporary file before the size limit is checked
+SUMMARY_FORM = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["file", "type", "summary_type"],
+            "properties": {
+                "file": {"type": "string", "format": "binary"},
+                "type": {"type": "string"},
+                "summary_type": {"type": "string"},
+            },
+        }}},
+    },
+}
+
+
+@app.post("/generate_summary", status_code=202, openapi_extra=SUMMARY_FORM)
+async def generate_summary(request: Request):
+    # Stream the upload to a unique file so the worker can read it after the request ends
+    try:
+        upload, fields = await receive_upload(request, UPLOAD_DIR, MAX_UPLOAD_BYTES)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidUpload as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    missing = [name for name in ("type", "summary_type") if name not in fields]
+    if missing:
+        os.remove(upload.path)
+        raise HTTPException(status_code=422, detail=f"Missing form fields: {', '.join(missing)}")
+
+    try:
+        job = await jobs.submit({
+            "path": upload.path,
+            "sha256": upload.sha256,
+            "size": upload.size,
+            "filename": upload.filename,
+            "type": fields["type"],
+            "summary_type": fields["summary_type"],
+        })
+    except JobQueueFull as e:
+        os.remove(upload.path)
+        return JSONResponse({"detail": str(e)}, status_code=429, headers={"Retry-After": "5"})
+
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}",
+        "result_url": f"/jobs/{job.id}/result",
+    }
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str, if_none_match: Optional[str] = Header(None)):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == "error":
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != "complete":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+
+    result = job.result
+    headers = {"ETag": result.etag, "Cache-Control": "private, max-age=3600"}
+    if if_none_match and _etag_matches(if_none_match, result.etag):
+        return Response(status_code=304, headers=headers)
+    headers["Content-Disposition"] = 'attachment; filename="generated_summary.pdf"'
+    return Response(result.content, media_type=result.media_type, headers=headers)
+
+def _etag_matches(if_none_match, etag):
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,29 @@
+import io
+from typing import Dict
+from xml.sax.saxutils import escape
+
+
+def render_summary_pdf(title: str, sections: Dict[str, str], details: Dict[str, str] = None) -> bytes:
+    """Render a summary (section name -> text, as in Document.sections) to PDF bytes.
+
+    Pure function with no shared state so it can run in a process pool; the PDF
+    is built in memory, never at a shared path on disk.
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+    styles = getSampleStyleSheet()
+    story = [Paragraph(escape(title), styles["Title"])]
+    for name, value in (details or {}).items():
+        story.append(Paragraph(f"<b>{escape(name)}:</b> {escape(value)}", styles["Normal"]))
+    for name, text in sections.items():
+        story.append(Spacer(1, 12))
+        story.append(Paragraph(escape(name), styles["Heading2"]))
+        for paragraph in text.split("\n\n"):
+            if paragraph.strip():
+                story.append(Paragraph(escape(paragraph.strip()), styles["BodyText"]))
+
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter, title=title).build(story)
+    return buffer.getvalue()
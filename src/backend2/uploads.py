@@ -0,0 +1,148 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Tuple
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+# Room in the body for multipart headers, boundaries and the small text fields
+FORM_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured size limit"""
+
+
+class InvalidUpload(Exception):
+    """Raised when the request body isn't a multipart form holding the expected file"""
+
+
+@dataclass
+class SavedUpload:
+    path: str
+    size: int
+    sha256: str
+    filename: str
+
+
+async def receive_upload(request: Request, directory: str, max_bytes: int, field: str = "file",
+                         max_field_bytes: int = FORM_OVERHEAD) -> Tuple[SavedUpload, Dict[str, str]]:
+    """Stream a multipart request's `field` file to a unique file, hashing it on the way.
+
+    Returns the saved file and the form's text fields. The body is parsed as
+    it arrives rather than spooled first, so the size limit applies while
+    receiving: a Content-Length over the limit is refused before anything is
+    read, and a body without one is cut off once the file passes max_bytes.
+    Disk writes run in the threadpool, and a partial file is removed on failure.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes + max_field_bytes:
+        raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+    _, params = parse_options_header(request.headers.get("content-type", ""))
+    if b"boundary" not in params:
+        raise InvalidUpload("Expected a multipart/form-data body")
+
+    form = _MultipartForm(field, max_field_bytes)
+    parser = MultipartParser(params[b"boundary"], form.callbacks())
+    digest = hashlib.sha256()
+    size, out, path = 0, None, None
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if out is None and form.filename is not None:
+                _, extension = os.path.splitext(os.path.basename(form.filename))
+                fd, path = await run_in_threadpool(tempfile.mkstemp, suffix=extension, dir=directory)
+                out = os.fdopen(fd, "wb")
+            if form.pending:
+                data = b"".join(form.pending)
+                form.pending.clear()
+                size += len(data)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+                digest.update(data)
+                await run_in_threadpool(out.write, data)
+        parser.finalize()
+        if out is None:
+            raise InvalidUpload(f"Missing file field '{field}'")
+        out.close()
+    except BaseException as e:
+        if out is not None:
+            out.close()
+            os.remove(path)
+        if isinstance(e, FormParserError):
+            raise InvalidUpload("Invalid multipart data") from e
+        raise
+    return SavedUpload(path=path, size=size, sha256=digest.hexdigest(), filename=form.filename), form.fields
+
+
+class _MultipartForm:
+    """python-multipart callbacks splitting a form into text fields and one file's data.
+
+    File data is queued in pending for receive_upload to write out after each
+    chunk, since the callbacks can't await the threadpool.
+    """
+
+    def __init__(self, file_field, max_field_bytes):
+        self.file_field = file_field
+        self.max_field_bytes = max_field_bytes
+        self.fields = {}
+        self.filename = None
+        self.pending = []
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._name = None
+        self._is_file = False
+        self._data = bytearray()
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self):
+        self._disposition, self._name, self._is_file = b"", None, False
+        self._data = bytearray()
+
+    def on_header_field(self, data, start, end):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name, self._header_value = b"", b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        if b"name" not in options:
+            raise InvalidUpload('Form part without a Content-Disposition "name"')
+        self._name = options[b"name"].decode("utf-8", "replace")
+        if self._name == self.file_field and b"filename" in options:
+            if self.filename is not None:
+                raise InvalidUpload(f"More than one file in field '{self.file_field}'")
+            self._is_file = True
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+
+    def on_part_data(self, data, start, end):
+        if self._is_file:
+            self.pending.append(bytes(data[start:end]))
+            return
+        self._data += data[start:end]
+        if len(self._data) > self.max_field_bytes:
+            raise InvalidUpload(f"Form field '{self._name}' exceeds {self.max_field_bytes} bytes")
+
+    def on_part_end(self):
+        if not self._is_file:
+            self.fields[self._name] = self._data.decode("utf-8", "replace")
@@ -99,6 +99,37 @@ const SummaryDisplay: React.FC<{ summary: string }> = ({ summary }) => (
   </div>
 );
 
+const API_URL = 'http://localhost:8000';
+const POLL_INTERVAL_MS = 2000;
+// Give up on a job (and mark its request as failed) if it hasn't finished by then
+const SUMMARY_TIMEOUT_MS = 15 * 60 * 1000;
+
+// Poll the summary job until it finishes, then download the generated PDF
+const waitForSummary = async (jobId: string): Promise<Blob> => {
+  const deadline = Date.now() + SUMMARY_TIMEOUT_MS;
+  for (;;) {
+    if (Date.now() >= deadline) {
+      throw new Error('Timed out waiting for the summary');
+    }
+    await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+    const statusResponse = await fetch(`${API_URL}/jobs/${jobId}`);
+    if (!statusResponse.ok) {
+      throw new Error('Failed to fetch summary status');
+    }
+    const job = await statusResponse.json();
+    if (job.status === 'error') {
+      throw new Error(job.error || 'Summary generation failed');
+    }
+    if (job.status === 'complete') {
+      const resultResponse = await fetch(`${API_URL}/jobs/${jobId}/result`);
+      if (!resultResponse.ok) {
+        throw new Error('Failed to download summary');
+      }
+      return resultResponse.blob();
+    }
+  }
+};
+
 const Summary: React.FC = () => {
   const [documents, setDocuments] = useState<Document[]>([]);
   const [summaryType, setSummaryType] = useState<string>("");
@@ -155,7 +186,7 @@ const Summary: React.FC = () => {
 
     try {
       setStatus('processing');
-      const response = await fetch('http://localhost:8000/generate_summary', {
+      const response = await fetch(`${API_URL}/generate_summary`, {
         method: 'POST',
         body: formData,
       });
@@ -164,7 +195,14 @@ const Summary: React.FC = () => {
         throw new Error('Failed to generate summary');
       }
 
-      const blob = await response.blob();
+      // The job is queued; free the form for the next request while it runs
+      const { job_id: jobId } = await response.json();
+      setDocuments([]);
+      setSummaryType("");
+      setStatus('idle');
+      setSummary('');
+
+      const blob = await waitForSummary(jobId);
       const url = window.URL.createObjectURL(blob);
 
       setSummaryRequests(prevRequests =>
@@ -174,13 +212,9 @@ const Summary: React.FC = () => {
             : req
         )
       );
-
-      setDocuments([]);
-      setSummaryType("");
-      setStatus('idle');
-      setSummary('');
     } catch (error) {
       setDocuments([]);
+      setStatus('idle');
       console.error('Error generating summary:', error);
       setSummaryRequests(prevRequests =>
         prevRequests.map(req =>